@@ -0,0 +1,44 @@
+# Benchmark for the memory used by the in-memory archive: plain dict records vs wotd.WordEntry
+# Each measurement runs in a fresh process so RSS is not polluted by earlier runs
+# Usage: python bench/bench_memory.py [sizes...]
+import os
+import subprocess
+import sys
+
+POS = ['Noun', 'Verb', 'Adjective', 'Adverb']
+
+def measure(representation, size):
+    import psutil
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+    import wotd
+
+    process = psutil.Process()
+    # Build every string first so only the records themselves differ between representations
+    # Like rows read from SQLite, every row gets its own copy of the part of speech
+    rows = [(f'{i:010}', f'word{i}', f'/wɜːd{i}/', (POS[i % 4] + ' ').rstrip(), f'Definition number {i}.') for i in range(size)]
+    baseline = process.memory_info().rss
+    if representation == 'dict':
+        records = [{'date': row[0], 'word': row[1], 'ipa': row[2], 'pos': row[3], 'definition': row[4]} for row in rows]
+    else:
+        records = [wotd.WordEntry(*row) for row in rows]
+    del rows
+    return process.memory_info().rss - baseline, len(records)
+
+def main():
+    if len(sys.argv) > 3 and sys.argv[1] == '--child':
+        used, _ = measure(sys.argv[2], int(sys.argv[3]))
+        print(used)
+        return
+
+    sizes = [int(size) for size in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f'{"entries":>10} {"dict":>12} {"WordEntry":>12} {"saved":>8}')
+    for size in sizes:
+        results = {}
+        for representation in ('dict', 'slots'):
+            output = subprocess.run([sys.executable, __file__, '--child', representation, str(size)], capture_output=True, text=True, check=True).stdout
+            results[representation] = int(output.strip().splitlines()[-1])
+        saved = 1 - results['slots'] / results['dict'] if results['dict'] else 0
+        print(f'{size:>10} {results["dict"] / 1048576:>9.1f} MB {results["slots"] / 1048576:>9.1f} MB {saved:>7.0%}')
+
+if __name__ == '__main__':
+    main()
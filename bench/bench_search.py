@@ -0,0 +1,64 @@
+# Benchmark for the full-text definition search (wotd.search_words) on a synthetic archive
+# Usage: python bench/bench_search.py [rows]
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import wotd
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+QUERIES = ['happy', 'words meaning happy', 'sound', 'a person who talks', 'ancient greek', 'zzzz']
+COMMON_WORDS = ['a', 'of', 'the', 'or', 'to', 'in', 'happy', 'sound', 'person', 'talks', 'ancient', 'greek', 'long', 'word']
+
+def make_vocabulary():
+    # A few common words followed by a long tail of rare ones, roughly like real definitions
+    vocabulary = COMMON_WORDS + [''.join(random.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(random.randint(3, 10))) for _ in range(20_000)]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    return vocabulary, weights
+
+def build_archive(path):
+    random.seed(0)
+    vocabulary, weights = make_vocabulary()
+    start = datetime(1800, 1, 1)
+    rows = []
+    for i in range(ROWS):
+        date = (start + timedelta(days=i)).strftime('%Y-%m-%d')
+        definition = ' '.join(random.choices(vocabulary, weights, k=random.randint(5, 20))) + '.'
+        rows.append((date, f'word{i}', '/wɜːd/', 'Noun', definition))
+    with sqlite3.connect(path) as conn:
+        conn.execute('''CREATE TABLE words (
+            date TEXT PRIMARY KEY,
+            word TEXT NOT NULL,
+            ipa TEXT,
+            pos TEXT,
+            definition TEXT,
+            UNIQUE(date)
+        )''')
+        conn.executemany('INSERT INTO words VALUES (?, ?, ?, ?, ?)', rows)
+        conn.commit()
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        wotd.DB_PATH = os.path.join(tmp, 'wotd.db')
+        build_archive(wotd.DB_PATH)
+
+        start = time.perf_counter()
+        wotd.load_wotd_db()  # Also builds the search index
+        print(f'Loaded and indexed {ROWS} rows in {time.perf_counter() - start:.2f}s')
+
+        for query in QUERIES:
+            timings = []
+            for page in range(1, 21):
+                start = time.perf_counter()
+                wotd.search_words(query, page=page, limit=10)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            print(f'{query!r:24} p50 {timings[len(timings) // 2]:7.2f} ms   p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} ms')
+
+if __name__ == '__main__':
+    main()
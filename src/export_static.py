@@ -0,0 +1,236 @@
+# Render the public site to a directory of static files, so it can be served by any static file server or CDN
+# while the Python process is down. Only pages whose inputs changed since the last export are rewritten
+# Usage: python src/export_static.py OUTPUT_DIR [--workers N] [--date-format American|Normal] [--full]
+import argparse
+import bisect
+import concurrent.futures
+from datetime import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+from flask import Flask, render_template
+
+os.environ['WOTD_NO_SERVE'] = '1'  # Import the site extension without starting its servers
+
+from logs import log_info, log_error
+import wotd
+
+MANIFEST_NAME = '.export-manifest.json'  # Input hash of every exported page, from the last run
+POOL_THRESHOLD = 200  # Below this many pages, starting worker processes costs more than it saves
+CHUNK_SIZE = 100  # Pages per task sent to a worker process
+ROUTE_PAGES = ['/about', '/subscribe', '/databases', '/articles/api-docs']  # Pages that are rendered through their route
+WWW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extensions', 'site', 'www')
+ASSET_URL_PATTERN = re.compile(r'''asset_url\(\s*['"]([^'"]+)['"]\s*\)''')
+
+site = None
+renderer = None  # Bare Flask app that renders the templates in worker processes
+
+def load_site():
+    '''Load the archive and the site extension, in the main process only'''
+    global site
+    if site is None:
+        wotd.current_date = datetime.now(wotd.tz).strftime('%Y-%m-%d')
+        wotd.load_wotd_db()
+        from extensions.site import extension
+        site = extension
+        site.limiter_www.enabled = False
+        site.limiter_api.enabled = False
+    return site
+
+def write_file(output_dir: str, path: str, content: bytes):
+    file_path = os.path.join(output_dir, *path.split('/'))
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    temp_path = f'{file_path}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(content)
+    os.replace(temp_path, file_path)  # Never leave a half-written page for the web server to pick up
+
+def init_worker(asset_urls: dict):
+    '''Set up a worker process to only render templates, without importing the site or opening the database'''
+    global renderer
+    renderer = Flask(__name__, static_folder=os.path.join(WWW_DIR, 'static'), static_url_path='/www/static', template_folder=os.path.join(WWW_DIR, 'templates'))
+    renderer.add_template_global(lambda name: asset_urls.get(name, f'/www/static/{name}'), 'asset_url')
+
+def collect_asset_urls() -> dict:
+    '''URL of every asset the templates ask for, so worker processes don't need the asset pipeline'''
+    names = set()
+    for root, _, filenames in os.walk(os.path.join(WWW_DIR, 'templates')):
+        for filename in filenames:
+            with open(os.path.join(root, filename), 'r', encoding='utf-8') as f:
+                names.update(ASSET_URL_PATTERN.findall(f.read()))
+    return {name: site.assets.url(name) for name in names}
+
+def plain(value):
+    '''Turn the named tuples in a template context into dicts and lists, which workers can unpickle without the site'''
+    if hasattr(value, '_asdict'):
+        return {key: plain(item) for key, item in value._asdict().items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    return value
+
+def page_template(kind: str, arg, date_format: str):
+    '''Template name and context of a page generated from the archive'''
+    if kind == 'index':
+        # There is no API to load more from, so older words are reached through the archive pages
+        return 'index.html', site.index_context('desktop', date_format, older_link='/archive/')
+    if kind == 'date':
+        view = site.build_today_view(arg)
+        return 'index.html', site.index_context('desktop', date_format, view=view, heading=f'Word of the Day for {view.words[date_format].date_formatted}', older_link='/archive/')
+    if kind == 'archive':
+        return 'lite/archive.html', site.archive_context(arg, date_format, page_link='/archive/{}/')
+    raise ValueError(f'Unknown page kind: {kind}')
+
+def render_pages(tasks: list, output_dir: str) -> int:
+    '''Render and write a list of (template name, context, path) pages, in whichever process this runs'''
+    app = renderer or site.app_www
+    with app.test_request_context('/'):
+        for template_name, context, path in tasks:
+            write_file(output_dir, path, render_template(template_name, **context).encode('utf-8'))
+    return len(tasks)
+
+def hash_inputs(*parts) -> str:
+    return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+def entry_key(entry):
+    return tuple(entry.values()) if entry else None
+
+def template_key(date_format: str) -> str:
+    '''Hash of everything every rendered page depends on besides its own words'''
+    sha256 = hashlib.sha256()
+    templates_dir = os.path.join(os.path.dirname(site.__file__), 'www', 'templates')
+    for root, _, filenames in sorted(os.walk(templates_dir)):
+        for filename in sorted(filenames):
+            with open(os.path.join(root, filename), 'rb') as f:
+                sha256.update(f.read())
+    sha256.update(repr((sorted(site.assets.urls.items()), date_format, datetime.now().year)).encode('utf-8'))
+    return sha256.hexdigest()
+
+def plan_pages(date_format: str) -> list:
+    '''Every page generated from the archive, as (kind, arg, path, input hash)'''
+    base_key = template_key(date_format)
+    archive = wotd.wotd_db
+    published = archive.dates[:bisect.bisect_right(archive.dates, datetime.now(wotd.tz).strftime('%Y-%m-%d'))]
+    pages = []
+
+    def page_words(date):
+        previous = wotd.query_previous(date, limit=3)['results']
+        return (entry_key(wotd.query_word(date)), tuple(entry_key(entry) for entry in previous))
+
+    pages.append(('index', None, 'index.html', hash_inputs(base_key, wotd.current_date, page_words(wotd.current_date))))
+    for date in published:
+        pages.append(('date', date, f'date/{date}/index.html', hash_inputs(base_key, date, page_words(date))))
+        pages.append(('query', date, f'api/query/{date}.json', hash_inputs(entry_key(wotd.query_word(date)))))
+
+    archive_pages = wotd.query_page(1, limit=site.ARCHIVE_PAGE_SIZE)['pages']
+    for page in range(1, archive_pages + 1):
+        query_result = wotd.query_page(page, limit=site.ARCHIVE_PAGE_SIZE)
+        key = hash_inputs(base_key, page, query_result['pages'], tuple(entry_key(entry) for entry in query_result['results']))
+        pages.append(('archive', page, f'archive/{page}/index.html', key))
+        if page == 1:
+            pages.append(('archive', page, 'archive/index.html', key))
+    return pages
+
+def export_routes(output_dir: str, manifest: dict) -> int:
+    '''Render the pages that have routes but don't come from the archive, writing only those that changed'''
+    client = site.app_www.test_client()
+    routes = ROUTE_PAGES + [f'/articles/{slug}' for slug in site.articles.slugs()]
+    written = 0
+    for route in routes:
+        response = client.get(route, headers={'Accept-Language': 'en-US'})
+        if response.status_code != 200:
+            log_error(f'Could not export {route}: HTTP {response.status_code}')
+            continue
+        path = f'{route.strip("/")}/index.html'
+        key = hashlib.sha256(response.data).hexdigest()
+        if manifest.get(path) != key or not os.path.exists(os.path.join(output_dir, *path.split('/'))):
+            write_file(output_dir, path, response.data)
+            written += 1
+        manifest[path] = key
+
+    response = client.get('/this-page-does-not-exist')  # Most static hosts serve 404.html for missing files
+    write_file(output_dir, '404.html', response.data)
+    return written
+
+def copy_file(src: str, dst: str):
+    '''Copy a file unless the destination is already up to date'''
+    stat = os.stat(src)
+    if os.path.exists(dst) and os.path.getsize(dst) == stat.st_size and os.path.getmtime(dst) >= stat.st_mtime:
+        return
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    shutil.copy2(src, dst)
+
+def export_static_files(output_dir: str):
+    '''Copy www/static and the database backups, and write the bundled assets, skipping files that are already up to date'''
+    static_dir = os.path.join(os.path.dirname(site.__file__), 'www', 'static')
+    for root, _, filenames in os.walk(static_dir):
+        for filename in filenames:
+            src = os.path.join(root, filename)
+            copy_file(src, os.path.join(output_dir, 'www', 'static', os.path.relpath(src, static_dir)))
+    # The /databases page links every backup, with its gzip copy next to it for hosts that can serve it
+    for backup in site.backup_catalog.list():
+        for filename in (backup.filename, backup.gz_filename):
+            if filename:
+                copy_file(os.path.join(site.backup_catalog.directory, filename), os.path.join(output_dir, 'databases', 'download', filename))
+    for asset in site.assets.assets.values():
+        if not os.path.exists(os.path.join(output_dir, 'www', 'dist', asset.filename)):  # Fingerprinted names never change content
+            write_file(output_dir, f'www/dist/{asset.filename}', asset.body)
+            write_file(output_dir, f'www/dist/{asset.filename}.gz', asset.gzip_body)
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the public Word of the Day site as static files.')
+    parser.add_argument('output_dir', help='Directory to write the site to')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes for large archives')
+    parser.add_argument('--date-format', choices=['American', 'Normal'], default='American', help='How dates are written on the pages')
+    parser.add_argument('--full', action='store_true', help='Rewrite every page, even if its inputs did not change')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    load_site()
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path) and not args.full:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    pages = plan_pages(args.date_format)
+    tasks = [(kind, arg, path) for kind, arg, path, key in pages
+             if manifest.get(path) != key or not os.path.exists(os.path.join(output_dir, *path.split('/')))]
+
+    # The data for every page is gathered here, workers only render templates and write files
+    template_tasks = []
+    with site.app_api.app_context():
+        for kind, arg, path in tasks:
+            if kind == 'query':
+                write_file(output_dir, path, site.app_api.json.response(wotd.query_word(arg)).get_data())
+            else:
+                template_tasks.append((*page_template(kind, arg, args.date_format), path))
+
+    if len(template_tasks) >= POOL_THRESHOLD and args.workers > 1:
+        chunks = [plain(template_tasks[i:i + CHUNK_SIZE]) for i in range(0, len(template_tasks), CHUNK_SIZE)]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(collect_asset_urls(),)) as pool:
+            for _ in pool.map(render_pages, chunks, [output_dir] * len(chunks)):
+                pass
+    else:
+        render_pages(template_tasks, output_dir)
+
+    for _, _, path, key in pages:
+        manifest[path] = key
+    routes_written = export_routes(output_dir, manifest)
+    export_static_files(output_dir)
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    log_info(f'Exported {len(tasks)} of {len(pages)} archive pages and {routes_written} other changed pages to {output_dir} in {time.perf_counter() - start:.1f}s')
+
+if __name__ == '__main__':
+    sys.exit(main())
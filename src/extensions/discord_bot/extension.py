@@ -46,22 +46,83 @@ subscribers.init_db()  # Initialize the database for subscribers
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_JSON = os.path.join(BASE_DIR, 'config.json')
 RATE_LIMIT = 45  # Requests allowed per second (slightly below the 50 requests per second limit)
-SEMAPHORE = asyncio.Semaphore(RATE_LIMIT)
 update_activity_count = 0
 wotd_loop_count = 0
 last_send_time = 0
+delivery_workers = []  # Keeps references to the worker tasks so they aren't garbage collected
 
 # Load config.json
 with open(CONFIG_JSON, 'r') as f:
     CONFIG_JSON = json.load(f)  # Reusing the variable lol
 ADMINS = set(CONFIG_JSON['admins'])
 MAX_SUBSCRIPTIONS_PER_GUILD = CONFIG_JSON['max_subscriptions_per_guild']
+DELIVERY_WORKERS = CONFIG_JSON.get('delivery_workers', 16)  # Deliveries in flight at once, the token bucket still caps the request rate
 
 # Load the bot token
 DOTENV_PATH = os.path.join(BASE_DIR, '.env')
 load_dotenv(DOTENV_PATH)
 TOKEN = os.getenv('DISCORD_TOKEN')
 
+class TokenBucket:
+    '''Rate limiter that allows `rate` acquisitions per second on average, in bursts of up to `capacity`'''
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:  # Waiters are served in order
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class DeliveryBatch:
+    '''The deliveries that were due in the same minute, logs their latency once all of them are done'''
+
+    def __init__(self, due, size):
+        self.due = due
+        self.size = size
+        self.sent = 0
+        self.failed = 0
+        self.latencies = []
+        self.rest_calls = 0  # Requests made to the Discord API for these deliveries
+
+    def record(self, sent):
+        if sent:
+            self.sent += 1
+            self.latencies.append((datetime.datetime.now(datetime.timezone.utc) - self.due).total_seconds())
+        else:
+            self.failed += 1
+        if self.sent + self.failed == self.size:
+            self.report()
+
+    def report(self):
+        if not self.latencies:
+            log_info(f'Sent 0/{self.size} Word of the Day messages due at {self.due:%H:%M} UTC, {self.failed} failed, {self.rest_calls} REST calls')
+            return
+        latencies = sorted(self.latencies)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[max(math.ceil(len(latencies) * 0.95) - 1, 0)]
+        log_info(f'Sent {self.sent}/{self.size} Word of the Day messages due at {self.due:%H:%M} UTC, {self.failed} failed, '
+                 f'latency p50 {p50:.1f}s, p95 {p95:.1f}s, max {latencies[-1]:.1f}s, '
+                 f'{self.rest_calls} REST calls ({self.rest_calls / self.size:.2f} per delivery)')
+
+rate_limiter = TokenBucket(RATE_LIMIT)
+delivery_queue = asyncio.Queue()  # (subscriber row, DeliveryBatch) waiting for a worker
+
+# Rendered messages by (date, include_date, include_ipa, is_dmy, message_date_style), for one archive version
+MESSAGE_CACHE_MAX_ENTRIES = 256
+message_cache = {}
+message_cache_version = None
+
 # Create a bot instance
 intents = discord.Intents.default()
 client = commands.Bot(command_prefix='! ', intents=intents)
@@ -95,6 +156,14 @@ embed_templates = {
             To unsubscribe, send `/unsubscribe`.''',
             'color': discord.Color.gold()
         },
+        'guild_no_webhook': {
+            'title': '**Subscribed** to Word of the Day!',
+            'description': '''This channel will now receive the Word of the Day every day at <t:0:t>.
+            The bot needs the `Manage Webhooks` permission to deliver through a webhook, so it will post the messages itself.
+            To configure settings, send `/config`.
+            To unsubscribe, send `/unsubscribe`.''',
+            'color': discord.Color.gold()
+        },
         'already': {
             'private': {
                 'title': 'You\'re already subscribed!',
@@ -180,8 +249,37 @@ async def on_ready():
     except Exception as e:
         log_exception(f'Error in on_ready: {str(e)}')
 
+async def get_channel_webhook(channel):
+    '''Reuse the channel's webhook made by the bot or create one, returns None without the Manage Webhooks permission'''
+    if not channel.permissions_for(channel.guild.me).manage_webhooks:
+        return None
+    try:
+        for webhook in await channel.webhooks():
+            if webhook.user == client.user and webhook.token:
+                return webhook
+        return await channel.create_webhook(name=client.user.name, reason='Word of the Day delivery')
+    except discord.errors.Forbidden:
+        return None  # Permissions changed in the meantime
+
+async def send_response(interaction, *args, **kwargs):
+    '''Reply to an interaction, through a followup if it was deferred'''
+    if interaction.response.is_done():
+        await interaction.followup.send(*args, **kwargs)
+    else:
+        await interaction.response.send_message(*args, **kwargs)
+
+async def delete_channel_webhook(subscriber):
+    '''Remove the webhook a channel subscriber was delivered through, if it still exists'''
+    if subscriber[18] is None:
+        return
+    try:
+        await discord.Webhook.partial(subscriber[18], subscriber[19], client=client).delete(reason='Unsubscribed from the Word of the Day')
+    except (discord.errors.Forbidden, discord.errors.NotFound):
+        pass
+
 @client.tree.command(name='subscribe', description='Subscribe to the Word of the Day.')
-async def subscribe(interaction: discord.Interaction):
+@app_commands.describe(webhook='Deliver to this channel through a webhook (text and news channels only)')
+async def subscribe(interaction: discord.Interaction, webhook: bool = False):
     try:
         if interaction.channel.type == discord.ChannelType.private:  # If the command was sent in a DM
             if subscribers.query_subscribed(interaction.user.id, None, None):
@@ -201,9 +299,19 @@ async def subscribe(interaction: discord.Interaction):
                         embed = create_embed('Error', f'This server has reached the maximum number of subscriptions ({MAX_SUBSCRIPTIONS_PER_GUILD}).', discord.Color.red())
                         await interaction.response.send_message(embed=embed, ephemeral=True)
                         return
-                    subscribers.subscribe(None, interaction.guild.id, interaction.channel.id)
-                    embed = create_embed(**embed_templates['subscribe']['guild'])
-                    await interaction.response.send_message(embed=embed, ephemeral=True)
+                    channel_webhook = None
+                    if webhook:
+                        await interaction.response.defer(ephemeral=True)  # Looking up or creating the webhook can take longer than Discord waits for a reply
+                        channel_webhook = await get_channel_webhook(interaction.channel)
+                    if channel_webhook:
+                        subscribers.subscribe(None, interaction.guild.id, interaction.channel.id, webhook_id=channel_webhook.id, webhook_token=channel_webhook.token)
+                    else:
+                        subscribers.subscribe(None, interaction.guild.id, interaction.channel.id)
+                    if webhook and not channel_webhook:
+                        embed = create_embed(**embed_templates['subscribe']['guild_no_webhook'])
+                    else:
+                        embed = create_embed(**embed_templates['subscribe']['guild'])
+                    await send_response(interaction, embed=embed, ephemeral=True)
             else:
                 embed = create_embed('Error', 'You must have the `Manage Channels` permission to subscribe this channel.', discord.Color.red())
                 await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -213,7 +321,7 @@ async def subscribe(interaction: discord.Interaction):
     except Exception as e:
         log_exception(f'Error in subscribe command: {str(e)}')
         try:
-            await interaction.response.send_message('An error occurred while processing your request.', ephemeral=True)
+            await send_response(interaction, 'An error occurred while processing your request.', ephemeral=True)
         except:
             pass
 
@@ -231,9 +339,13 @@ async def unsubscribe(interaction: discord.Interaction):
         elif interaction.channel.type == discord.ChannelType.text or interaction.channel.type == discord.ChannelType.news:  # If the command was sent in a text channel
             if interaction.user.guild_permissions.manage_channels:
                 if subscribers.query_subscribed(None, interaction.guild.id, interaction.channel.id):
+                    for subscriber in subscribers.get_subscriber_data(None, interaction.guild.id, interaction.channel.id):
+                        if subscriber[18] is not None and not interaction.response.is_done():
+                            await interaction.response.defer(ephemeral=True)
+                        await delete_channel_webhook(subscriber)
                     subscribers.unsubscribe(None, interaction.guild.id, interaction.channel.id)
                     embed = create_embed(**embed_templates['unsubscribe']['guild'])
-                    await interaction.response.send_message(embed=embed, ephemeral=True)
+                    await send_response(interaction, embed=embed, ephemeral=True)
                 else:
                     embed = create_embed(**embed_templates['unsubscribe']['already']['guild'])
                     await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -246,7 +358,7 @@ async def unsubscribe(interaction: discord.Interaction):
     except Exception as e:
         log_exception(f'Error in unsubscribe command: {str(e)}')
         try:
-            await interaction.response.send_message('An error occurred while processing your request.', ephemeral=True)
+            await send_response(interaction, 'An error occurred while processing your request.', ephemeral=True)
         except:
             pass
 
@@ -296,7 +408,7 @@ async def config_reset(interaction: discord.Interaction):
     try:
         if interaction.channel.type == discord.ChannelType.private:  # If the command was sent in a DM
             if subscribers.query_subscribed(interaction.user.id, None, None):
-                subscribers.configure(interaction.user.id, None, None, 0, True)
+                subscribers.configure(interaction.user.id, None, None, 'UTC', 0, 0, 0, 0, 0, 0, 0, False, True, True, True, 1)
                 embed = create_embed('Configuration Reset', 'Your subscription settings have been reset.', discord.Color.green())
                 await interaction.response.send_message(embed=embed, ephemeral=True)
             else:
@@ -355,9 +467,13 @@ async def forget_me(interaction: discord.Interaction):
         elif interaction.channel.type == discord.ChannelType.text or interaction.channel.type == discord.ChannelType.news:  # If the command was sent in a text channel
             if interaction.user.guild_permissions.manage_channels:
                 if subscribers.query_subscribed(None, interaction.guild.id, interaction.channel.id):
+                    for subscriber in subscribers.get_subscriber_data(None, interaction.guild.id, interaction.channel.id):
+                        if subscriber[18] is not None and not interaction.response.is_done():
+                            await interaction.response.defer(ephemeral=True)
+                        await delete_channel_webhook(subscriber)
                     subscribers.unsubscribe(None, interaction.guild.id, interaction.channel.id)
                     embed = create_embed(**embed_templates['forgotten']['guild'])
-                    await interaction.response.send_message(embed=embed, ephemeral=True)
+                    await send_response(interaction, embed=embed, ephemeral=True)
                 else:
                     embed = create_embed(**embed_templates['forgotten']['already']['guild'])
                     await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -370,7 +486,7 @@ async def forget_me(interaction: discord.Interaction):
     except Exception as e:
         log_exception(f'Error in forget_me command: {str(e)}')
         try:
-            await interaction.response.send_message('An error occurred while processing your request.', ephemeral=True)
+            await send_response(interaction, 'An error occurred while processing your request.', ephemeral=True)
         except:
             pass
 
@@ -399,7 +515,9 @@ async def request_data(interaction: discord.Interaction):
                 'include_date': subscriber_data[0][13],
                 'include_ipa': subscriber_data[0][14],
                 'is_dmy': subscriber_data[0][15],
-                'message_date_style': subscriber_data[0][16]
+                'message_date_style': subscriber_data[0][16],
+                'dm_channel_id': subscriber_data[0][17],
+                'webhook_id': subscriber_data[0][18]
             }
             # Serialize JSON
             json_bytes = json.dumps(data_dict, indent=4).encode('utf-8')
@@ -425,26 +543,36 @@ async def request_data(interaction: discord.Interaction):
         except:
             pass
 
-def format_message(user_id, guild_id, channel_id):
-    subscriber_config = subscribers.get_subscriber_data(user_id, guild_id, channel_id)
-    if not subscriber_config:
-        return None
-    subscriber_config = subscriber_config[0]  # Get the first row from the result
-    timezone_str = subscriber_config[4]  # Timezone string
-    send_time = subscriber_config[5]  # time_sunday (index 5), stored in minutes
-    include_date = subscriber_config[13]  # Bool for include_date
-    include_ipa = subscriber_config[14]  # Bool for include_ipa
-    is_dmy = subscriber_config[15]  # Bool for is_dmy
-    message_date_style = subscriber_config[16]  # Nibble for message_date_style
+def format_message(subscriber):
+    '''The Word of the Day message for a subscriber row, rendered once per date and format options and shared by everyone using them'''
+    global message_cache_version
+    timezone_str = subscriber[4]  # Timezone string
+    include_date = subscriber[13]  # Bool for include_date
+    include_ipa = subscriber[14]  # Bool for include_ipa
+    is_dmy = subscriber[15]  # Bool for is_dmy
+    message_date_style = subscriber[16]  # Nibble for message_date_style
 
     # Get date information from the subscribers timezone and send_time
     timezone = pytz.timezone(timezone_str)
     now_in_tz = datetime.datetime.now(timezone)
+    send_time = subscriber[subscribers.DAY_COLUMNS[now_in_tz.weekday()]] or 0  # Today's time, stored in minutes
     send_hour = send_time // 60
     send_minute = send_time % 60
     send_datetime_in_tz = now_in_tz.replace(hour=send_hour, minute=send_minute, second=0, microsecond=0)
     if now_in_tz < send_datetime_in_tz:
         send_datetime_in_tz -= timedelta(days=1)
+
+    # The message only depends on the date and the format options, so it is the same for most subscribers
+    version = wotd.archive_version
+    if version != message_cache_version or len(message_cache) >= MESSAGE_CACHE_MAX_ENTRIES:
+        message_cache.clear()  # A word was added or edited, or old dates piled up
+        message_cache_version = version
+    key = (send_datetime_in_tz.date(), bool(include_date), bool(include_ipa), bool(is_dmy), message_date_style)
+    if key not in message_cache:
+        message_cache[key] = render_message(send_datetime_in_tz, *key[1:])
+    return message_cache[key]
+
+def render_message(send_datetime_in_tz, include_date, include_ipa, is_dmy, message_date_style):
     year_number = send_datetime_in_tz.year
     month_number = send_datetime_in_tz.month
     month_name = send_datetime_in_tz.strftime('%B')
@@ -452,9 +580,10 @@ def format_message(user_id, guild_id, channel_id):
     day_number = send_datetime_in_tz.day
 
     # Get the Word of the Day for the date the subscriber is receiving it in their time zone
-    # TODO: If anybody reading through this code cares this much about micro-optimization, this could be optimized to avoid querying the database every time
     wotd_date_str = send_datetime_in_tz.strftime('%Y-%m-%d')
     subscriber_wotd = wotd.query_word(date=wotd_date_str)
+    if subscriber_wotd is None:
+        return None
 
     message = ''
 
@@ -553,6 +682,100 @@ async def update_activity_loop():
         # Sleep until the next second is 00
         await asyncio.sleep(60 - now.second)
 
+async def rest_call(batch, global_limit=True):
+    '''Wait for the rate limiter before a request to the Discord API, and count it'''
+    if global_limit:  # Webhooks have their own buckets and don't count against the bot's limit
+        await rate_limiter.acquire()
+    batch.rest_calls += 1
+
+async def deliver_wotd(subscriber, batch):
+    '''Send the Word of the Day to one subscriber, returns whether it was sent'''
+    subscriber_user_id = subscriber[1]
+    subscriber_guild_id = subscriber[2]
+    subscriber_channel_id = subscriber[3]
+    try:
+        if subscriber_user_id is not None:
+            wotd_message = format_message(subscriber)
+            if not wotd_message:
+                return False
+
+            dm_channel_id = subscriber[17]
+            if dm_channel_id is not None:
+                # Send straight to the known DM channel, one request instead of fetching the user and opening the DM
+                try:
+                    await rest_call(batch)
+                    await client.get_partial_messageable(dm_channel_id, type=discord.ChannelType.private).send(wotd_message, silent=bool(subscriber[12]))
+                    return True
+                except discord.errors.NotFound:
+                    log_info(f'DM channel of subscriber {subscriber[0]} was not found, resolving it again')
+
+            # First delivery, or the stored DM channel is gone
+            await rest_call(batch)
+            user = await client.fetch_user(subscriber_user_id)
+            dm_channel = user.dm_channel
+            if dm_channel is None:
+                await rest_call(batch)
+                dm_channel = await user.create_dm()
+            subscribers.set_dm_channel(subscriber[0], dm_channel.id)
+            await rest_call(batch)
+            await dm_channel.send(wotd_message, silent=bool(subscriber[12]))  # Silent message
+            return True
+        else:
+            guild = client.get_guild(subscriber_guild_id)
+            if not guild:
+                subscribers.unsubscribe(None, subscriber_guild_id, subscriber_channel_id)
+                return False
+
+            channel = guild.get_channel(subscriber_channel_id)
+            if not channel:
+                subscribers.unsubscribe(None, subscriber_guild_id, subscriber_channel_id)
+                return False
+
+            wotd_message = format_message(subscriber)
+            if not wotd_message:
+                return False
+
+            if subscriber[18] is not None:
+                try:
+                    await rest_call(batch, global_limit=False)
+                    await discord.Webhook.partial(subscriber[18], subscriber[19], client=client).send(wotd_message, username=client.user.name, avatar_url=client.user.display_avatar.url)
+                    return True
+                except (discord.errors.Forbidden, discord.errors.NotFound):
+                    # The webhook was deleted or its token revoked, go back to posting as the bot
+                    log_info(f'Webhook of subscriber {subscriber[0]} is gone, delivering through the bot instead')
+                    subscribers.set_webhook(subscriber[0], None, None)
+
+            await rest_call(batch)
+            await channel.send(wotd_message)
+            return True
+
+    except discord.errors.Forbidden:
+        # Bot doesn't have permission, unsubscribe
+        if subscriber_user_id is not None:
+            subscribers.unsubscribe(subscriber_user_id, None, None)
+        else:
+            subscribers.unsubscribe(None, subscriber_guild_id, subscriber_channel_id)
+    except discord.errors.NotFound:
+        # User/channel not found, unsubscribe
+        if subscriber_user_id is not None:
+            subscribers.unsubscribe(subscriber_user_id, None, None)
+        else:
+            subscribers.unsubscribe(None, subscriber_guild_id, subscriber_channel_id)
+    return False
+
+async def delivery_worker():
+    '''Takes deliveries off the queue one at a time, several of these run at once'''
+    while True:
+        subscriber, batch = await delivery_queue.get()
+        sent = False
+        try:
+            sent = await deliver_wotd(subscriber, batch)
+        except Exception as e:
+            log_error(f'Failed to deliver the Word of the Day to subscriber {subscriber[0]}: {e}')
+        finally:
+            batch.record(sent)
+            delivery_queue.task_done()
+
 async def send_wotd_loop():
     '''The main loop that sends the Word of the Day to subscribers at their scheduled times.'''
     global wotd_loop_count, last_send_time
@@ -562,6 +785,9 @@ async def send_wotd_loop():
 
     log_info('Word of the Day Discord Bot loop started')
 
+    for _ in range(DELIVERY_WORKERS):
+        delivery_workers.append(asyncio.create_task(delivery_worker()))
+
     while True:
         try:
             if subscribers.count_subscribers() == 0:
@@ -569,83 +795,18 @@ async def send_wotd_loop():
                 await asyncio.sleep(60)
                 continue
             else:
-                subscribers_to_notify = []  # Initialize list of subscribers to notify this minute
-                # Make a list of the current minute and the date for every timezone in pytz
-                timezone_times = {}
-                for tz_name in pytz.all_timezones:
-                    timezone = pytz.timezone(tz_name)
-                    now_in_tz = datetime.datetime.now(timezone)
-                    current_weekday = now_in_tz.weekday()  # 0=Monday, 6=Sunday
-                    current_time_minute = now_in_tz.hour * 60 + now_in_tz.minute  # Total minutes since midnight, 0-1439
-                    timezone_times[tz_name] = (current_weekday, current_time_minute)
-                
-                # Get every single subscriber, check their timezone, and see if they match the current time
-                all_subscribers = subscribers.get_subscriber_data()  # Get fresh data from DB
-                for subscriber in all_subscribers:
-                    subscriber_tz_str = subscriber[4]  # Timezone string
-                    current_weekday, current_time_minute = timezone_times[subscriber_tz_str]
-                    
-                    # Since we don't have per-day scheduling yet, just use Sunday's time for all days
-                    scheduled_time_minutes = subscriber[5]  # time_sunday (index 5) - stored in MINUTES
-                    
-                    if scheduled_time_minutes is None:
-                        continue
-                    
-                    # Compare minutes directly
-                    if scheduled_time_minutes == current_time_minute:
-                        subscribers_to_notify.append(subscriber)
-                
-                # Send messages with rate limiting
-                for subscriber in subscribers_to_notify:
-                    async with SEMAPHORE:  # Rate limit: max 45 concurrent requests
-                        try:
-                            subscriber_user_id = subscriber[1]
-                            subscriber_guild_id = subscriber[2]
-                            subscriber_channel_id = subscriber[3]
-                            
-                            if subscriber_user_id is not None:
-                                user = await client.fetch_user(subscriber_user_id)
-                                wotd_message = format_message(subscriber_user_id, None, None)
-                                subscriber_config = subscribers.get_subscriber_data(subscriber_user_id, None, None)
-                                if wotd_message:
-                                    if subscriber_config and subscriber_config[0][12]:  # Silent message
-                                        await user.send(wotd_message, silent=True)
-                                    else:
-                                        await user.send(wotd_message)
-                                    # Small delay between messages to avoid hitting rate limits
-                                    await asyncio.sleep(0.1)
-                            else:
-                                guild = client.get_guild(subscriber_guild_id)
-                                if not guild:
-                                    subscribers.unsubscribe(None, subscriber_guild_id, subscriber_channel_id)
-                                    continue
-                                    
-                                channel = guild.get_channel(subscriber_channel_id)
-                                if not channel:
-                                    subscribers.unsubscribe(None, subscriber_guild_id, subscriber_channel_id)
-                                    continue
-                                    
-                                wotd_message = format_message(None, subscriber_guild_id, subscriber_channel_id)
-                                if wotd_message:
-                                    await channel.send(wotd_message)
-                                    # Small delay between messages
-                                    await asyncio.sleep(0.1)
-                                    
-                        except discord.errors.Forbidden:
-                            # Bot doesn't have permission, unsubscribe
-                            if subscriber_user_id is not None:
-                                subscribers.unsubscribe(subscriber_user_id, None, None)
-                            else:
-                                subscribers.unsubscribe(None, subscriber_guild_id, subscriber_channel_id)
-                        except discord.errors.NotFound:
-                            # User/channel not found, unsubscribe
-                            if subscriber_user_id is not None:
-                                subscribers.unsubscribe(subscriber_user_id, None, None)
-                            else:
-                                subscribers.unsubscribe(None, subscriber_guild_id, subscriber_channel_id)
-                        except Exception as e:
-                            continue
-                            
+                # Subscribers are indexed by the UTC minute of the week they are due, per day and accounting for DST
+                now = datetime.datetime.now(datetime.timezone.utc)
+                subscribers_to_notify = subscribers.get_due_subscribers(now)
+
+                if subscribers_to_notify:
+                    # Workers send them while this loop waits for the next minute
+                    batch = DeliveryBatch(now.replace(second=0, microsecond=0), len(subscribers_to_notify))
+                    for subscriber in subscribers_to_notify:
+                        delivery_queue.put_nowait((subscriber, batch))
+                    if delivery_queue.qsize() > len(subscribers_to_notify):
+                        log_warning(f'Delivery queue is behind, {delivery_queue.qsize() - len(subscribers_to_notify)} deliveries from earlier minutes are still waiting')
+
         except Exception as e:
             log_exception(f'Error in send_wotd_loop: {str(e)}')
             await asyncio.sleep(60)
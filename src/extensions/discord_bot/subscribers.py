@@ -1,15 +1,140 @@
+import datetime
 import os
+import pytz
 import sqlite3
 import threading
 
-from logs import log_info, log_error
+from logs import log_info, log_warning, log_error
 
 SUBSCRIBERS_DB_PATH = os.path.join(os.path.dirname(__file__), 'subscribers.db')
 
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DAY_COLUMNS = (6, 7, 8, 9, 10, 11, 5)  # Row index of time_monday..time_saturday, time_sunday, in datetime.weekday() order
+SCHEDULE_HORIZON = datetime.timedelta(days=7)  # Time zone offsets are checked again at least this often
+
+# Columns added after the first release, in row order, by name and type
+ADDED_COLUMNS = {
+    'dm_channel_id': 'INTEGER',  # Row index 17, resolved on the first DM delivery
+    'webhook_id': 'INTEGER',  # Row index 18, for channels that opted in to webhook delivery
+    'webhook_token': 'TEXT'  # Row index 19
+}
+ADDED_COLUMN_INDICES = {column: 17 + i for i, column in enumerate(ADDED_COLUMNS)}
+
 # In-memory cache of subscribers with thread safety
 subscribers_db = []
 _cache_lock = threading.Lock()
 
+# Schedule index, UTC minute of the week (0 is Monday 00:00 UTC) -> {subscriber id: row}, guarded by _cache_lock
+schedule = {}
+_schedule_slots = {}  # Subscriber id -> (time zone, minutes of the week it is filed under)
+_zone_rows = {}  # Time zone -> {subscriber id: row}
+_zone_offsets = {}  # Time zone -> (UTC offset in minutes the index uses, when that offset next changes)
+_schedule_expires = None  # Earliest offset change of any time zone in the index
+
+def minute_of_week(now):
+    '''Minute of the week of a UTC datetime, 0 is Monday 00:00'''
+    return now.weekday() * MINUTES_PER_DAY + now.hour * 60 + now.minute
+
+def _utc_offset(zone, at):
+    return round(at.astimezone(zone).utcoffset().total_seconds() / 60)
+
+def _next_offset_change(zone, at):
+    '''First minute after `at` where the zone's UTC offset changes, or `at` + SCHEDULE_HORIZON if it doesn't change before then'''
+    offset = _utc_offset(zone, at)
+    start = at
+    end = at + SCHEDULE_HORIZON
+    while start < end:
+        if _utc_offset(zone, start + datetime.timedelta(hours=1)) != offset:
+            # The change is somewhere in this hour, narrow it down to the minute
+            low, high = 0, 60
+            while high - low > 1:
+                middle = (low + high) // 2
+                if _utc_offset(zone, start + datetime.timedelta(minutes=middle)) == offset:
+                    low = middle
+                else:
+                    high = middle
+            return start + datetime.timedelta(minutes=high)
+        start += datetime.timedelta(hours=1)
+    return end
+
+def _file_row(row, now):
+    '''Add a subscriber to the schedule index, under the UTC minutes its local times fall on with its time zone's current offset'''
+    global _schedule_expires
+    zone_name = row[4]
+    try:
+        zone = pytz.timezone(zone_name)
+    except pytz.UnknownTimeZoneError:
+        log_warning(f'Subscriber {row[0]} has an unknown time zone {zone_name!r} and will not be scheduled')
+        return
+
+    if zone_name not in _zone_offsets:
+        next_change = _next_offset_change(zone, now)
+        _zone_offsets[zone_name] = (_utc_offset(zone, now), next_change)
+        if _schedule_expires is None or next_change < _schedule_expires:
+            _schedule_expires = next_change
+    offset = _zone_offsets[zone_name][0]
+
+    slots = []
+    for weekday, column in enumerate(DAY_COLUMNS):
+        local_minute = row[column]
+        if local_minute is None:
+            continue
+        slot = (weekday * MINUTES_PER_DAY + int(local_minute) - offset) % MINUTES_PER_WEEK
+        schedule.setdefault(slot, {})[row[0]] = row
+        slots.append(slot)
+    _schedule_slots[row[0]] = (zone_name, slots)
+    _zone_rows.setdefault(zone_name, {})[row[0]] = row
+
+def _unfile_row(row_id):
+    '''Remove a subscriber from the schedule index'''
+    zone_name, slots = _schedule_slots.pop(row_id, (None, ()))
+    for slot in slots:
+        due = schedule[slot]
+        del due[row_id]
+        if not due:
+            del schedule[slot]
+    rows = _zone_rows.get(zone_name)
+    if rows is not None:
+        del rows[row_id]
+        if not rows:
+            del _zone_rows[zone_name]
+            del _zone_offsets[zone_name]
+
+def _rebuild_schedule(now):
+    global _schedule_expires
+    schedule.clear()
+    _schedule_slots.clear()
+    _zone_rows.clear()
+    _zone_offsets.clear()
+    _schedule_expires = None
+    for row in subscribers_db:
+        _file_row(row, now)
+
+def _refresh_schedule(now):
+    '''Re-file the subscribers of every time zone whose UTC offset changed since the index was built'''
+    global _schedule_expires
+    for zone_name, (offset, next_change) in list(_zone_offsets.items()):
+        if next_change > now:
+            continue
+        zone = pytz.timezone(zone_name)
+        new_offset = _utc_offset(zone, now)
+        _zone_offsets[zone_name] = (new_offset, _next_offset_change(zone, now))
+        if new_offset != offset:
+            log_info(f'UTC offset of {zone_name} changed from {offset} to {new_offset} minutes, rescheduling its subscribers')
+            for row in list(_zone_rows[zone_name].values()):
+                _unfile_row(row[0])
+                _file_row(row, now)
+    _schedule_expires = min((next_change for _, next_change in _zone_offsets.values()), default=None)
+
+def get_due_subscribers(now):
+    '''Every subscriber scheduled for the UTC minute of `now`'''
+    with _cache_lock:
+        if _schedule_expires is not None and now >= _schedule_expires:
+            _refresh_schedule(now)
+        due = schedule.get(minute_of_week(now))
+        return list(due.values()) if due else []
+
 def init_db():
     global subscribers_db
     try:
@@ -32,12 +157,21 @@ def init_db():
                 include_date BOOLEAN DEFAULT 1,
                 include_ipa BOOLEAN DEFAULT 1,
                 is_dmy BOOLEAN DEFAULT 1,
-                message_date_style TINYINT DEFAULT 1 CHECK(message_date_style BETWEEN 0 AND 3)
+                message_date_style TINYINT DEFAULT 1 CHECK(message_date_style BETWEEN 0 AND 3),
+                dm_channel_id INTEGER,
+                webhook_id INTEGER,
+                webhook_token TEXT
             )''')
+            # Add columns introduced after the table was first created
+            columns = {column[1] for column in c.execute('PRAGMA table_info(subscribers)')}
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in columns:
+                    c.execute(f'ALTER TABLE subscribers ADD COLUMN {column} {column_type}')
             conn.commit()
             c.execute('SELECT * FROM subscribers')
             with _cache_lock:
                 subscribers_db = c.fetchall()
+                _rebuild_schedule(datetime.datetime.now(datetime.timezone.utc))
     except Exception as e:
         log_error(f'Failed to initialize database: {e}')
 
@@ -82,7 +216,7 @@ def get_subscriber_data(user_id=None, guild_id=None, channel_id=None):
         log_error(f'Failed to get subscriber data: {e}')
         return []
 
-def subscribe(user_id, guild_id, channel_id, timezone='UTC', time_sunday=0, time_monday=0, time_tuesday=0, time_wednesday=0, time_thursday=0, time_friday=0, time_saturday=0, silent_message=False, include_date=True, include_ipa=True, is_dmy=True, message_date_style=1):
+def subscribe(user_id, guild_id, channel_id, timezone='UTC', time_sunday=0, time_monday=0, time_tuesday=0, time_wednesday=0, time_thursday=0, time_friday=0, time_saturday=0, silent_message=False, include_date=True, include_ipa=True, is_dmy=True, message_date_style=1, webhook_id=None, webhook_token=None):
     global subscribers_db
 
     try:
@@ -91,18 +225,19 @@ def subscribe(user_id, guild_id, channel_id, timezone='UTC', time_sunday=0, time
         
         with sqlite3.connect(SUBSCRIBERS_DB_PATH) as conn:
             c = conn.cursor()
-            c.execute('''INSERT INTO subscribers (user_id, guild_id, channel_id, timezone, time_sunday, time_monday, time_tuesday, time_wednesday, time_thursday, time_friday, time_saturday, silent_message, include_date, include_ipa, is_dmy, message_date_style)
-                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                      (user_id, guild_id, channel_id, timezone, time_sunday, time_monday, time_tuesday, time_wednesday, time_thursday, time_friday, time_saturday, silent_message, include_date, include_ipa, is_dmy, message_date_style))
+            c.execute('''INSERT INTO subscribers (user_id, guild_id, channel_id, timezone, time_sunday, time_monday, time_tuesday, time_wednesday, time_thursday, time_friday, time_saturday, silent_message, include_date, include_ipa, is_dmy, message_date_style, webhook_id, webhook_token)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                      (user_id, guild_id, channel_id, timezone, time_sunday, time_monday, time_tuesday, time_wednesday, time_thursday, time_friday, time_saturday, silent_message, include_date, include_ipa, is_dmy, message_date_style, webhook_id, webhook_token))
             conn.commit()
             
             # Get the ID of the newly inserted row
             new_id = c.lastrowid
             
             # Add the new subscriber to the cache
-            new_row = (new_id, user_id, guild_id, channel_id, timezone, time_sunday, time_monday, time_tuesday, time_wednesday, time_thursday, time_friday, time_saturday, silent_message, include_date, include_ipa, is_dmy, message_date_style)
+            new_row = (new_id, user_id, guild_id, channel_id, timezone, time_sunday, time_monday, time_tuesday, time_wednesday, time_thursday, time_friday, time_saturday, silent_message, include_date, include_ipa, is_dmy, message_date_style, None, webhook_id, webhook_token)
             with _cache_lock:
                 subscribers_db.append(new_row)
+                _file_row(new_row, datetime.datetime.now(datetime.timezone.utc))
             
     except sqlite3.IntegrityError:
         pass  # Ignore duplicate subscriptions
@@ -149,14 +284,15 @@ def unsubscribe(user_id=None, guild_id=None, channel_id=None):
             # Remove matching rows from the cache
             with _cache_lock:
                 before_filter = len(subscribers_db)
-                subscribers_db[:] = [
-                    row for row in subscribers_db
-                    if not (
-                        (user_id is None or row[1] == user_id) and
+                kept_rows = []
+                for row in subscribers_db:
+                    if ((user_id is None or row[1] == user_id) and
                         (guild_id is None or row[2] == guild_id) and
-                        (channel_id is None or row[3] == channel_id)
-                    )
-                ]
+                        (channel_id is None or row[3] == channel_id)):
+                        _unfile_row(row[0])
+                    else:
+                        kept_rows.append(row)
+                subscribers_db[:] = kept_rows
                 count_after = len(subscribers_db)
             
     except Exception as e:
@@ -252,6 +388,7 @@ def configure(user_id=None, guild_id=None, channel_id=None, timezone=None,
             conn.commit()
 
             # Update the cache - find matching rows and update them
+            now = datetime.datetime.now(datetime.timezone.utc)
             with _cache_lock:
                 for i, row in enumerate(subscribers_db):
                     if ((user_id is None or row[1] == user_id) and
@@ -282,8 +419,42 @@ def configure(user_id=None, guild_id=None, channel_id=None, timezone=None,
                             if value is not None:
                                 row_list[field_indices[field]] = value
                         
-                        # Replace the row in cache
+                        # Replace the row in cache, and file it again in case its times or time zone changed
                         subscribers_db[i] = tuple(row_list)
+                        _unfile_row(row[0])
+                        _file_row(subscribers_db[i], now)
                     
     except Exception as e:
-        log_error(f'Failed to configure subscription for user {user_id}: {e}')
\ No newline at end of file
+        log_error(f'Failed to configure subscription for user {user_id}: {e}')
+
+def _set_added_columns(row_id, **values):
+    '''Update columns from ADDED_COLUMNS of one subscriber, in the database and the cache'''
+    with sqlite3.connect(SUBSCRIBERS_DB_PATH) as conn:
+        conn.execute('UPDATE subscribers SET ' + ', '.join(f'{column} = ?' for column in values) + ' WHERE id = ?', (*values.values(), row_id))
+        conn.commit()
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with _cache_lock:
+        for i, row in enumerate(subscribers_db):
+            if row[0] == row_id:
+                row_list = list(row)
+                for column, value in values.items():
+                    row_list[ADDED_COLUMN_INDICES[column]] = value
+                subscribers_db[i] = tuple(row_list)
+                _unfile_row(row_id)
+                _file_row(subscribers_db[i], now)
+                break
+
+def set_dm_channel(row_id, dm_channel_id):
+    '''Remember the DM channel of a subscriber, so later deliveries can send to it directly'''
+    try:
+        _set_added_columns(row_id, dm_channel_id=dm_channel_id)
+    except Exception as e:
+        log_error(f'Failed to save the DM channel of subscriber {row_id}: {e}')
+
+def set_webhook(row_id, webhook_id, webhook_token):
+    '''Set or, with None, clear the webhook a channel subscriber is delivered through'''
+    try:
+        _set_added_columns(row_id, webhook_id=webhook_id, webhook_token=webhook_token)
+    except Exception as e:
+        log_error(f'Failed to save the webhook of subscriber {row_id}: {e}')
\ No newline at end of file
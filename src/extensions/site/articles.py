@@ -0,0 +1,103 @@
+import os
+import re
+import threading
+from typing import NamedTuple
+
+import markdown
+
+SLUG_PATTERN = re.compile(r'^[a-z0-9][a-z0-9-]*$')  # Also keeps requests from escaping the articles directory
+TITLE_PATTERN = re.compile(r'^#\s+(.+?)\s*$', re.MULTILINE)
+
+class Article(NamedTuple):
+    title: str
+    html: str
+    mtime: float  # Modification time of the source file this was compiled from
+
+def md_to_html(md_content: str) -> str:
+    # Convert markdown with extra extensions for attributes
+    html_content = markdown.markdown(
+        md_content,
+        extensions=['attr_list', 'fenced_code']
+    )
+    
+    # Post-process HTML to wrap sections and add classes
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    # Add classes to headings
+    for h1 in soup.find_all('h1'):
+        h1['class'] = h1.get('class', []) + ['heading-primary']
+    for h2 in soup.find_all('h2'):
+        h2['class'] = h2.get('class', []) + ['heading-secondary']
+
+    # Add class to all <code> tags for inline code
+    for code_tag in soup.find_all('code'):
+        code_tag['class'] = code_tag.get('class', []) + ['inline-code']
+    
+    # Wrap each h2 and its following content in a section
+    sections = []
+    current_section = None
+    
+    for element in list(soup.children):
+        if element.name == 'h1':
+            if current_section:
+                sections.append(current_section)
+            current_section = soup.new_tag('section', **{'class': 'article-section'})
+            current_section.append(element.extract())
+        elif current_section is not None:
+            current_section.append(element.extract())
+    
+    if current_section:
+        sections.append(current_section)
+    
+    # Rebuild soup with sections
+    new_soup = BeautifulSoup('', 'html.parser')
+    for section in sections:
+        new_soup.append(section)
+    
+    html_content = str(new_soup)
+
+    return html_content
+
+class ArticleRegistry:
+    '''Markdown articles in a directory, each compiled to HTML once and recompiled only when its file changes'''
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.articles = {}
+        self._lock = threading.Lock()
+
+    def slugs(self) -> list:
+        '''Slugs of every article in the directory'''
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(filename[:-3] for filename in os.listdir(self.directory) if filename.endswith('.md') and SLUG_PATTERN.match(filename[:-3]))
+
+    def get(self, slug: str):
+        '''Return the compiled Article for a slug, or None if there is no such article'''
+        if not SLUG_PATTERN.match(slug):
+            return None
+        path = os.path.join(self.directory, f'{slug}.md')
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            self.articles.pop(slug, None)
+            return None
+
+        article = self.articles.get(slug)
+        if article is not None and article.mtime == mtime:
+            return article
+
+        with self._lock:
+            article = self.articles.get(slug)
+            if article is None or article.mtime != mtime:  # Another thread may have compiled it while we waited
+                with open(path, 'r', encoding='utf-8') as f:
+                    md_content = f.read()
+                title = TITLE_PATTERN.search(md_content)
+                article = Article(
+                    title=title.group(1) if title else slug.replace('-', ' ').title(),
+                    html=md_to_html(md_content),
+                    mtime=mtime
+                )
+                self.articles[slug] = article
+        return article
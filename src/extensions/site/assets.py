@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import os
+import posixpath
+import re
+import threading
+from typing import NamedTuple
+
+from logs import log_warning
+
+# Bundles built from the files in www/static, by the name templates use for them
+CSS_BUNDLES = {
+    'css/main.css': 'css/main.css'  # Entry point, its @imports are inlined
+}
+JS_BUNDLES = {
+    'js/site.js': ['js/mobile-menu.js', 'js/toggle-theme.js'],  # Loaded on every page
+    'js/load-more.js': ['js/load-more.js'],
+    'js/config-discord.js': ['js/config-discord.js'],
+    'js/admin-append-word.js': ['js/admin-append-word.js']
+}
+MIMETYPES = {
+    '.css': 'text/css',
+    '.js': 'text/javascript'
+}
+
+IMPORT_PATTERN = re.compile(r'''@import\s+(?:url\()?['"]?([^'")]+)['"]?\)?\s*;''')
+URL_PATTERN = re.compile(r'''url\(\s*['"]?([^'")]+)['"]?\s*\)''')
+
+class Asset(NamedTuple):
+    filename: str  # Fingerprinted, like main.3f2a1b4c.css
+    body: bytes
+    gzip_body: bytes
+    mimetype: str
+    etag: str
+
+def minify_css(css: str) -> str:
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,])\s*', r'\1', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+def minify_js(js: str) -> str:
+    # Conservative on purpose: only drops indentation, blank lines and whole-line comments, never touches code
+    lines = []
+    in_template = False  # Inside a multi-line `template literal`, where whitespace is content
+    in_comment = False
+    for line in js.splitlines():
+        stripped = line.strip()
+        if in_template:
+            lines.append(line)
+        elif in_comment:
+            in_comment = '*/' not in stripped
+            continue
+        elif not stripped or stripped.startswith('//'):
+            continue
+        elif stripped.startswith('/*'):
+            in_comment = '*/' not in stripped
+            continue
+        else:
+            lines.append(stripped)
+        if line.count('`') % 2 == 1:
+            in_template = not in_template
+    return '\n'.join(lines)
+
+def fingerprint(name: str, body: bytes) -> str:
+    root, ext = posixpath.splitext(posixpath.basename(name))
+    return f'{root}.{hashlib.sha256(body).hexdigest()[:12]}{ext}'
+
+class AssetPipeline:
+    '''Concatenated, minified and gzipped CSS/JS bundles with content-hashed filenames, built once and served from memory'''
+
+    def __init__(self, static_dir: str, static_url_path: str, url_prefix: str):
+        self.static_dir = static_dir
+        self.static_url_path = static_url_path  # Where Flask serves static_dir from
+        self.url_prefix = url_prefix  # Where the bundles are served from
+        self.assets = {}  # Fingerprinted filename -> Asset
+        self.urls = {}  # Bundle name -> fingerprinted URL
+        self.file_versions = {}  # Static file name -> content hash, for files served as they are
+        self._lock = threading.Lock()
+
+    def build(self):
+        assets = {}
+        urls = {}
+        for name, entry_point in CSS_BUNDLES.items():
+            body = minify_css(self.inline_css(entry_point, set())).encode('utf-8')
+            self.add(assets, urls, name, body)
+        for name, sources in JS_BUNDLES.items():
+            js = '\n;\n'.join(self.read(source) for source in sources)
+            self.add(assets, urls, name, minify_js(js).encode('utf-8'))
+        self.assets, self.urls = assets, urls
+
+    def add(self, assets, urls, name, body):
+        filename = fingerprint(name, body)
+        assets[filename] = Asset(
+            filename=filename,
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=9, mtime=0),
+            mimetype=MIMETYPES[posixpath.splitext(name)[1]],
+            etag=filename
+        )
+        urls[name] = f'{self.url_prefix}/{filename}'
+
+    def read(self, name: str) -> str:
+        with open(os.path.join(self.static_dir, *name.split('/')), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def inline_css(self, name: str, seen: set) -> str:
+        '''Read a stylesheet with its @imports inlined and its url()s pointing at versioned static files'''
+        if name in seen:
+            return ''
+        seen.add(name)
+        directory = posixpath.dirname(name)
+
+        def replace_url(match):
+            url = match.group(1)
+            if url.startswith(('data:', 'http:', 'https:', '/', '#')):
+                return match.group(0)
+            return f"url('{self.url(posixpath.normpath(posixpath.join(directory, url)))}')"
+
+        def replace_import(match):
+            imported = posixpath.normpath(posixpath.join(directory, match.group(1)))
+            try:
+                return self.inline_css(imported, seen)
+            except OSError:
+                log_warning(f'Stylesheet {name} imports {imported}, which does not exist')  # Browsers skip these too
+                return ''
+
+        css = URL_PATTERN.sub(replace_url, self.read(name))
+        return IMPORT_PATTERN.sub(replace_import, css)
+
+    def static_url(self, name: str) -> str:
+        '''URL of a file served as it is from static_dir, with its content hash so it can be cached forever'''
+        version = self.file_versions.get(name)
+        if version is None:
+            with open(os.path.join(self.static_dir, *name.split('/')), 'rb') as f:
+                version = hashlib.sha256(f.read()).hexdigest()[:12]
+            with self._lock:
+                self.file_versions[name] = version
+        return f'{self.static_url_path}/{name}?v={version}'
+
+    def url(self, name: str) -> str:
+        '''URL to use in templates for a bundle or static file'''
+        url = self.urls.get(name)
+        if url is not None:
+            return url
+        try:
+            return self.static_url(name)
+        except OSError:
+            return f'{self.static_url_path}/{name}'
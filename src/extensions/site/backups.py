@@ -0,0 +1,100 @@
+import datetime
+import hashlib
+import os
+import threading
+from typing import NamedTuple
+
+HASH_CHUNK_SIZE = 1048576
+
+class Backup(NamedTuple):
+    filename: str
+    month: str  # Like "June 2025"
+    size: int
+    filesize: str  # Human readable size
+    sha256: str
+    gz_filename: str  # Precompressed copy, or None if there isn't an up to date one
+    mtime: float
+
+def format_size(size: int) -> str:
+    if size < 1024:  # If you believe this should be 1,000, please don't make a pull request
+        return f'{size} B'
+    elif size < 1048576:
+        return f'{round(size / 1024)} KB'
+    elif size < 1073741824:
+        return f'{round(size / 1048576)} MB'
+    else:
+        return f'{round(size / 1073741824)} GB'
+
+def hash_file(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+class BackupCatalog:
+    '''The backups directory, scanned and hashed once and rescanned only when the directory's mtime changes'''
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.dir_mtime = None
+        self.backups = ()  # Newest first
+        self.by_filename = {}
+        self._lock = threading.Lock()
+
+    def list(self) -> tuple:
+        '''All backups, newest month first'''
+        try:
+            dir_mtime = os.stat(self.directory).st_mtime
+        except OSError:
+            dir_mtime = None
+        if dir_mtime != self.dir_mtime:
+            with self._lock:
+                if dir_mtime != self.dir_mtime:  # Another thread may have rescanned it while we waited
+                    self.refresh(dir_mtime)
+        return self.backups
+
+    def get(self, filename: str):
+        '''The backup with this filename, or None if there is none'''
+        self.list()
+        return self.by_filename.get(filename)
+
+    def refresh(self, dir_mtime):
+        previous = self.by_filename
+        backups = []
+        filenames = set(os.listdir(self.directory)) if dir_mtime is not None else set()
+        for filename in filenames:
+            if not filename.endswith('.db'):
+                continue
+            try:
+                # Format the month to say the month name and year
+                month = datetime.datetime.strptime(filename.split('_')[1].split('.')[0], '%Y-%m').strftime('%B %Y')
+                stat = os.stat(os.path.join(self.directory, filename))
+            except (IndexError, ValueError, OSError):
+                continue
+
+            # Only rehash files that changed since the last scan
+            old = previous.get(filename)
+            if old is not None and old.size == stat.st_size and old.mtime == stat.st_mtime:
+                sha256 = old.sha256
+            else:
+                sha256 = hash_file(os.path.join(self.directory, filename))
+
+            gz_filename = f'{filename}.gz'
+            if gz_filename not in filenames or os.stat(os.path.join(self.directory, gz_filename)).st_mtime < stat.st_mtime:
+                gz_filename = None  # Missing or older than the database itself
+
+            backups.append(Backup(
+                filename=filename,
+                month=month,
+                size=stat.st_size,
+                filesize=format_size(stat.st_size),
+                sha256=sha256,
+                gz_filename=gz_filename,
+                mtime=stat.st_mtime
+            ))
+
+        backups.sort(key=lambda backup: backup.filename, reverse=True)
+        self.backups = tuple(backups)
+        self.by_filename = {backup.filename: backup for backup in backups}
+        self.dir_mtime = dir_mtime
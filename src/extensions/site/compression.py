@@ -0,0 +1,118 @@
+import gzip
+import zlib
+
+from werkzeug.datastructures import Headers
+
+import wotd
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+ENCODINGS = ('gzip', 'deflate')  # In order of preference
+
+def choose_encoding(accept_encoding: str, encodings=ENCODINGS):
+    '''The encoding out of `encodings` to use for an Accept-Encoding header, or None to send the response as it is'''
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    best = None
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0 and (best is None or quality > accepted.get(best, accepted.get('*', 0.0))):
+            best = encoding
+    return best
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    return zlib.compress(body, level)
+
+def tag_etag(etag: str, encoding: str) -> str:
+    '''ETag of the compressed variant, like "abc-gzip" for "abc"'''
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return f'{etag}-{encoding}'
+
+def untag_etags(if_none_match: str) -> str:
+    '''Turn ETags of compressed variants back into the ETag the app knows'''
+    for encoding in ENCODINGS:
+        if_none_match = if_none_match.replace(f'-{encoding}"', '"')
+    return if_none_match
+
+class CompressionMiddleware:
+    '''WSGI middleware that gzips or deflates text responses for clients that accept it.
+    Compressed bodies of responses with an ETag are kept in a cache, so a cached response is only compressed once'''
+
+    def __init__(self, app, level: int = 6, min_size: int = 512, cache=None):
+        self.app = app
+        self.level = level
+        self.min_size = min_size  # Smaller bodies aren't worth the CPU or the gzip header
+        self.cache = cache
+
+    def __call__(self, environ, start_response):
+        encoding = choose_encoding(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH', '')
+        if encoding is not None and if_none_match:
+            environ['HTTP_IF_NONE_MATCH'] = untag_etags(if_none_match)
+
+        captured = []
+        def capture_start_response(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return lambda data: None  # Flask never uses the legacy write callable
+
+        app_iter = self.app(environ, capture_start_response)
+        status, headers, exc_info = captured
+        headers = Headers(headers)
+
+        etag = headers.get('ETag')
+        if status.startswith('304') and encoding is not None and etag and tag_etag(etag, encoding) in if_none_match:
+            # The client revalidated its compressed copy, answer with that copy's ETag
+            headers['ETag'] = tag_etag(etag, encoding)
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return app_iter
+
+        mimetype = headers.get('Content-Type', '').split(';')[0].strip()
+        if not mimetype.startswith(COMPRESSIBLE_TYPES) or 'Content-Encoding' in headers:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return app_iter
+
+        # The representation depends on Accept-Encoding, even if this one isn't compressed
+        vary = headers.get('Vary')
+        if not vary:
+            headers['Vary'] = 'Accept-Encoding'
+        elif 'accept-encoding' not in vary.lower():
+            headers['Vary'] = f'{vary}, Accept-Encoding'
+
+        content_length = headers.get('Content-Length', type=int)
+        if (encoding is None or not status.startswith('200') or content_length is None or content_length < self.min_size
+                or environ.get('REQUEST_METHOD') == 'HEAD'):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return app_iter
+
+        key = (etag, encoding)
+        version = wotd.archive_version
+        compressed = self.cache.get(key, version) if self.cache is not None and etag else None
+        if compressed is None:
+            try:
+                body = b''.join(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+            compressed = compress(body, encoding, self.level)
+            if self.cache is not None and etag:
+                self.cache.put(key, version, compressed)
+        elif hasattr(app_iter, 'close'):
+            app_iter.close()
+
+        headers['Content-Encoding'] = encoding
+        headers['Content-Length'] = str(len(compressed))
+        if etag:
+            headers['ETag'] = tag_etag(etag, encoding)
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return [compressed]
@@ -1,28 +1,38 @@
 import argon2
 import asyncio
 import base64
+import csv
 import datetime
 from dotenv import load_dotenv
-from flask import Flask, jsonify, render_template, send_from_directory, request
+from flask import Flask, Response, abort, jsonify, render_template, send_from_directory, request
+from flask.json.provider import DefaultJSONProvider
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from jinja2 import FileSystemBytecodeCache
 import hashlib
-from io import BytesIO
+from io import BytesIO, StringIO
 import json
-import markdown
 import os
 from PIL import Image
 import pytz
 import requests
 import secrets
-import shutil
 import sys
 import threading
+import time
+from types import MappingProxyType
+from typing import NamedTuple
 from waitress import serve
+import zlib
 
 from main import MAIN_DOMAIN, API_DOMAIN, VERSION
 from logs import log_info, log_warning, log_error, log_exception
 import wotd
+from .articles import ArticleRegistry
+from .assets import AssetPipeline
+from .backups import BackupCatalog
+from .compression import CompressionMiddleware, choose_encoding
+from .response_cache import ResponseCache, cached, make_conditional
 
 # Detect whether this is the first time this file is being imported
 global first_import
@@ -47,6 +57,18 @@ app_www = Flask(__name__, static_folder='www/static', static_url_path='/www/stat
 app_status = Flask(__name__, static_folder='status', static_url_path='')
 app_api = Flask(__name__, static_folder='api', static_url_path='')
 
+class WOTDJSONProvider(DefaultJSONProvider):
+    '''JSON provider that can serialize the read-only entries returned by wotd'''
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, wotd.WordEntry):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+app_www.json = WOTDJSONProvider(app_www)
+app_api.json = WOTDJSONProvider(app_api)
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Load the admin password from .env
@@ -79,6 +101,14 @@ API_THREADS = CONFIG_JSON['api']['threads']
 API_BACKLOG = CONFIG_JSON['api']['backlog']
 API_RATE_LIMIT_MAX_REQUESTS = CONFIG_JSON['api']['rate_limit']['max_requests']
 API_RATE_LIMIT_WINDOW_MS = CONFIG_JSON['api']['rate_limit']['window_ms']
+# Response cache configuration
+CACHE_MAX_ENTRIES = CONFIG_JSON.get('cache', {}).get('max_entries', 1024)
+# Compression configuration
+COMPRESSION_LEVEL = CONFIG_JSON.get('compression', {}).get('level', 6)
+COMPRESSION_MIN_SIZE = CONFIG_JSON.get('compression', {}).get('min_size', 512)
+# Template configuration
+TEMPLATES_BYTECODE_CACHE_DIR = CONFIG_JSON.get('templates', {}).get('bytecode_cache_dir')  # None uses a directory in the system temp folder
+TEMPLATES_PRECOMPILE = CONFIG_JSON.get('templates', {}).get('precompile', True)
 
 # Enable rate limits
 limiter_www = Limiter(
@@ -92,62 +122,53 @@ limiter_api = Limiter(
     default_limits=[f'{API_RATE_LIMIT_MAX_REQUESTS} per {API_RATE_LIMIT_WINDOW_MS // 1000} seconds']
 )
 
-index_word, index_ipa, index_pos, index_definition, index_date, current_date, day, day_suffix, month_name, year, date_formatted = '', '', '', '', '', '', '', '', '', '', ''
-
-previous_wotds = None
-
-has_more = False
-
-def md_to_html(md_content: str) -> str:
-    # Convert markdown with extra extensions for attributes
-    html_content = markdown.markdown(
-        md_content,
-        extensions=['attr_list', 'fenced_code']
-    )
-    
-    # Post-process HTML to wrap sections and add classes
-    from bs4 import BeautifulSoup
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Add classes to headings
-    for h1 in soup.find_all('h1'):
-        h1['class'] = h1.get('class', []) + ['heading-primary']
-    for h2 in soup.find_all('h2'):
-        h2['class'] = h2.get('class', []) + ['heading-secondary']
-
-    # Add class to all <code> tags for inline code
-    for code_tag in soup.find_all('code'):
-        code_tag['class'] = code_tag.get('class', []) + ['inline-code']
-    
-    # Wrap each h2 and its following content in a section
-    sections = []
-    current_section = None
-    
-    for element in list(soup.children):
-        if element.name == 'h1':
-            if current_section:
-                sections.append(current_section)
-            current_section = soup.new_tag('section', **{'class': 'article-section'})
-            current_section.append(element.extract())
-        elif current_section is not None:
-            current_section.append(element.extract())
-    
-    if current_section:
-        sections.append(current_section)
-    
-    # Rebuild soup with sections
-    new_soup = BeautifulSoup('', 'html.parser')
-    for section in sections:
-        new_soup.append(section)
-    
-    html_content = str(new_soup)
-
-    return html_content
-
-# Load static articles
-SETUP_DISCORD_HTML = md_to_html(open(os.path.join(BASE_DIR, 'www', 'static', 'articles', 'setup-discord.md'), 'r', encoding='utf-8').read())
-TERMS_DISCORD_HTML = md_to_html(open(os.path.join(BASE_DIR, 'www', 'static', 'articles', 'terms-discord.md'), 'r', encoding='utf-8').read())
-PRIVACY_DISCORD_HTML = md_to_html(open(os.path.join(BASE_DIR, 'www', 'static', 'articles', 'privacy-discord.md'), 'r', encoding='utf-8').read())
+# Cache encoded responses until the archive changes
+www_cache = ResponseCache(max_entries=CACHE_MAX_ENTRIES)
+api_cache = ResponseCache(max_entries=CACHE_MAX_ENTRIES)
+# Rendered home pages, one per (day, device type, date format), so only a handful ever exist at once
+index_cache = ResponseCache(max_entries=16)
+# Lite archive pages, by (day, page, date format)
+archive_cache = ResponseCache(max_entries=CACHE_MAX_ENTRIES)
+# Compressed bodies by (ETag, encoding), so cached responses aren't compressed again on every request
+compression_cache = ResponseCache(max_entries=CACHE_MAX_ENTRIES)
+
+# Compress responses for clients that accept it
+app_www.wsgi_app = CompressionMiddleware(app_www.wsgi_app, level=COMPRESSION_LEVEL, min_size=COMPRESSION_MIN_SIZE, cache=compression_cache)
+app_api.wsgi_app = CompressionMiddleware(app_api.wsgi_app, level=COMPRESSION_LEVEL, min_size=COMPRESSION_MIN_SIZE, cache=compression_cache)
+
+# Markdown articles, compiled on first view and recompiled only when the file changes
+articles = ArticleRegistry(os.path.join(BASE_DIR, 'www', 'static', 'articles'))
+
+# Monthly database backups, rescanned only when the backups directory changes
+backup_catalog = BackupCatalog(wotd.BACKUPS_PATH)
+
+# Bundled, minified and precompressed CSS/JS with fingerprinted URLs, templates link to them with asset_url()
+assets = AssetPipeline(os.path.join(BASE_DIR, 'www', 'static'), app_www.static_url_path, '/www/dist')
+build_start = time.perf_counter()
+assets.build()
+log_info(f'Built {len(assets.assets)} static asset bundles in {(time.perf_counter() - build_start) * 1000:.1f} ms')
+app_www.add_template_global(assets.url, 'asset_url')
+
+IMMUTABLE_MAX_AGE = 31536000  # One year, fingerprinted URLs never change their content
+
+# Keep compiled templates on disk, so a restart doesn't parse and compile every template again
+if TEMPLATES_BYTECODE_CACHE_DIR:
+    os.makedirs(TEMPLATES_BYTECODE_CACHE_DIR, exist_ok=True)
+app_www.jinja_env.bytecode_cache = FileSystemBytecodeCache(TEMPLATES_BYTECODE_CACHE_DIR)
+
+def precompile_templates():
+    '''Load every template up front, so no request pays for compiling one'''
+    compile_start = time.perf_counter()
+    template_names = app_www.jinja_env.list_templates()
+    for template_name in template_names:
+        try:
+            app_www.jinja_env.get_template(template_name)
+        except Exception as e:
+            log_error(f'Failed to compile template {template_name}: {e}')
+    log_info(f'Precompiled {len(template_names)} templates in {(time.perf_counter() - compile_start) * 1000:.1f} ms')
+
+if TEMPLATES_PRECOMPILE:
+    precompile_templates()
 
 def get_device_type(user_agent: str) -> str:
     mobile_keywords = ['mobile', 'android', 'iphone', 'ipod', 'blackberry', 'iemobile', 'opera mini']
@@ -160,6 +181,19 @@ def get_device_type(user_agent: str) -> str:
         device_type = 'desktop'
     return device_type
 
+def get_date_format(accept_lang: str) -> str:
+    date_format = 'Normal'
+    if 'en-US' in accept_lang:
+        date_format = 'American'  # God bless America :eagle:
+    return date_format
+
+def is_lite_request(device_type: str) -> bool:
+    '''Whether to serve the lightweight, JS-free pages: to retro consoles, to clients asking to save data, or when asked with ?lite=1'''
+    lite = request.args.get('lite')
+    if lite is not None:
+        return lite == '1'
+    return device_type == 'wii' or request.headers.get('Save-Data', '').lower() == 'on'
+
 def get_github_data(handle: str):
     url = f'https://api.github.com/users/{handle}'
     try:
@@ -186,107 +220,91 @@ def generate_token():
     token = base64.urlsafe_b64encode(random_bytes).decode('utf-8').rstrip('=')
     return token
 
-def get_wotd():
-    global index_word, index_ipa, index_pos, index_definition, index_date, current_date
-    current_wotd = wotd.query_word(date=wotd.current_date)
-    if current_wotd:
-        index_word = current_wotd['word']
-        index_ipa = current_wotd['ipa']
-        index_pos = current_wotd['pos']
-        index_definition = current_wotd['definition']
-        index_date = current_wotd['date']
-        current_date = current_wotd['date']
-    
-    # Parse the date correctly for YYYY-MM-DD format
-    date_parts = current_date.split('-')
-    if len(date_parts) == 3:
-        year = date_parts[0]
-        month = date_parts[1]
-        day = date_parts[2]
-        
-        # Remove leading zeros from day
-        day = day.lstrip('0')
-        
-        # Set the appropriate suffix for the day
-        if day[-1] == '1' and day != '11':
-            day_suffix = 'st'
-        elif day[-1] == '2' and day != '12':
-            day_suffix = 'nd'
-        elif day[-1] == '3' and day != '13':
-            day_suffix = 'rd'
-        else:
-            day_suffix = 'th'
-            
-        # Get the month name
-        month_name = datetime.datetime.strptime(month, '%m').strftime('%B')
-        
-        # Format the complete date
-        date_formatted = f'{month_name} {day}{day_suffix}, {year}'
-    else:
-        # Default values if date format is unexpected
-        day, day_suffix, month_name, year = '', '', '', ''
-        date_formatted = 'Date unavailable'
-
-def get_previous_wotd():
-    global previous_wotds
-    global has_more
-    query_result = wotd.query_previous(date=wotd.current_date, limit=3)
-    if query_result and 'results' in query_result:
-        previous_wotds = query_result['results']
-        has_more = query_result.get('has_more', False)
-        return {
-            'previous_wotds': previous_wotds,
-            'has_more': query_result.get('has_more', False)
-        }
+DATE_FORMATS = ('American', 'Normal')
+
+def format_date(date: str, date_format: str) -> str:
+    '''Format a YYYY-MM-DD date for display, like "June 1st, 2025" (American) or "1 June 2025" (Normal)'''
+    try:
+        date_obj = datetime.datetime.strptime(date, '%Y-%m-%d')
+    except (TypeError, ValueError) as e:
+        log_warning(f'Failed to parse date {date}: {e}')
+        return '????-??-??'
+
+    day = str(date_obj.day)
+    if day[-1] == '1' and day != '11':
+        day_suffix = 'st'
+    elif day[-1] == '2' and day != '12':
+        day_suffix = 'nd'
+    elif day[-1] == '3' and day != '13':
+        day_suffix = 'rd'
     else:
-        previous_wotds = None
-        has_more = query_result.get('has_more', False)
-        return {
-            'previous_wotds': None,
-            'has_more': False
-        }
+        day_suffix = 'th'
+    month_name = date_obj.strftime('%B')
+    year = str(date_obj.year)
+
+    if date_format == 'American':
+        return f'{month_name} {day}{day_suffix}, {year}'
+    return f'{day} {month_name} {year}'
+
+class DisplayWord(NamedTuple):
+    '''A word formatted for display in one date format'''
+    date: str
+    date_formatted: str
+    word: str
+    ipa: str
+    pos: str
+    definition: str
+
+class TodayView(NamedTuple):
+    '''Everything the home page shows for one day, built once per archive version and shared read-only by all threads'''
+    date: str
+    words: MappingProxyType  # Date format -> DisplayWord of the word of the day
+    previous: MappingProxyType  # Date format -> tuple of DisplayWords of the previous words
+    has_more: bool
+    next_cursor: str
+
+def make_display_word(date: str, entry, date_format: str) -> DisplayWord:
+    word = entry['word'] if entry else ''
+    return DisplayWord(
+        date=date,
+        date_formatted=format_date(date, date_format),
+        word=word[:1].upper() + word[1:],
+        ipa=entry['ipa'] if entry else '',
+        pos=entry['pos'] if entry else '',
+        definition=entry['definition'] if entry else ''
+    )
 
-def get_wotd_databases():
-    global index_inject_html
-    global databases_inject_html
-
-    index_inject_html = ''
-    databases_inject_html = ''
-
-    # Read all files in BASE_PATH/dat/backups
-    backup_path = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(sys.modules['__main__'].__file__)), '..', 'dat', 'backups'))
-    databases = []
-    if os.path.exists(backup_path):
-        for filename in os.listdir(backup_path):
-            if filename.endswith('.db'):
-                # Get file size and format it
-                file_path = os.path.join(backup_path, filename)
-                file_size = os.path.getsize(file_path)
-                if file_size < 1024:  # If you believe this should be 1,000, please don't make a pull request
-                    file_size = f'{file_size} B'
-                elif file_size < 1048576:
-                    file_size = f'{round(file_size / 1024)} KB'
-                elif file_size < 1073741824:
-                    file_size = f'{round(file_size / 1048576)} MB'
-                else:
-                    file_size = f'{round(file_size / 1073741824)} GB'
-                # Format the month to say the month name and year
-                month = filename.split('_')[1].split('.')[0]
-                month = datetime.datetime.strptime(month, '%Y-%m').strftime('%B %Y')
-                # Append to databases list
-                databases.append({
-                    'name': filename,
-                    'month': month,
-                    'filename': filename,
-                    'filesize': file_size
-                })
-
-    return databases
+def build_today_view(date: str, allow_future: bool = False) -> TodayView:
+    '''Build the home page data for a date from the current archive'''
+    current_wotd = wotd.query_word(date=date)
+    query_result = wotd.query_previous(date=date, limit=3, allow_future=allow_future)
+    previous_wotds = query_result.get('results') or []
+
+    return TodayView(
+        date=date,
+        words=MappingProxyType({date_format: make_display_word(date, current_wotd, date_format) for date_format in DATE_FORMATS}),
+        previous=MappingProxyType({
+            date_format: tuple(make_display_word(entry['date'], entry, date_format) for entry in previous_wotds)
+            for date_format in DATE_FORMATS
+        }),
+        has_more=bool(previous_wotds) and query_result.get('has_more', False),
+        next_cursor=query_result.get('next_cursor') if previous_wotds else None
+    )
+
+today_view = (None, None)  # (archive version, date) the view was built for, and the view itself
+
+def get_today_view() -> TodayView:
+    global today_view
+    key = (wotd.archive_version, wotd.current_date)  # Read before building, so a concurrent change triggers another rebuild
+    view_key, view = today_view
+    if view_key != key:
+        view = build_today_view(wotd.current_date)
+        today_view = (key, view)  # Swapped in as a whole, readers never see a half-built view
+    return view
 
 # Initialize these on startup
 global github_data
-get_wotd()
-get_previous_wotd()
+get_today_view()
 github_data = get_github_data('gilgamesh8443')
 
 def generate_config_discord_link(is_user: bool, user_id: int = None, guild_id: int = None, channel_id: int = None, name: str = None, avatar_url: str = None) -> str:
@@ -325,99 +343,126 @@ def generate_config_discord_link(is_user: bool, user_id: int = None, guild_id: i
 
     return link
 
+def cached_page(cache, key, render):
+    '''Serve a rendered page from a cache of encoded pages, rendering it only if it isn't there yet'''
+    def build():
+        body = render().encode('utf-8')
+        return (body, hashlib.sha1(body).hexdigest())
+
+    body, etag = cache.get_or_build(key, build)
+
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.vary.update(('User-Agent', 'Accept-Language', 'Save-Data'))  # The page depends on the device type and date format
+    return make_conditional(response)
+
 @app_www.route('/')
 def www_index():
-    # Get data
-    get_wotd()
-    get_previous_wotd()
     device_type = get_device_type(request.headers.get('User-Agent', ''))
-    accept_lang = request.headers.get('Accept-Language', 'en-US')
-    date_format = 'Normal'
-    if 'en-US' in accept_lang:
-        date_format = 'American'  # God bless America :eagle:
+    date_format = get_date_format(request.headers.get('Accept-Language', 'en-US'))
+
+    # The page only changes with the day, the archive, the device type and the date format, so render each variant once
+    if is_lite_request(device_type):
+        return cached_page(index_cache, (wotd.current_date, 'lite', date_format), lambda: render_lite_index(date_format))
+    return cached_page(index_cache, (wotd.current_date, device_type, date_format), lambda: render_index(device_type, date_format))
+
+def render_index(device_type: str, date_format: str, view: TodayView = None, heading: str = None, older_link: str = None) -> str:
+    return render_template('index.html', **index_context(device_type, date_format, view, heading, older_link))
+
+def index_context(device_type: str, date_format: str, view: TodayView = None, heading: str = None, older_link: str = None) -> dict:
+    # Get data
+    if view is None:
+        view = get_today_view()
+    current = view.words[date_format]
 
     wotd_text = ''
     if device_type == 'mobile':
         wotd_text = 'WOTD'
     else:
         wotd_text = 'Word of the Day'
-    
-    # Format date for current WOTD
-    if current_date:
-        date_obj = datetime.datetime.strptime(current_date, '%Y-%m-%d')
-        day = str(date_obj.day)
-        day_suffix = ''
-        if day[-1] == '1' and day != '11':
-            day_suffix = 'st'
-        elif day[-1] == '2' and day != '12':
-            day_suffix = 'nd'
-        elif day[-1] == '3' and day != '13':
-            day_suffix = 'rd'
-        else:
-            day_suffix = 'th'
-        month_name = date_obj.strftime('%B')
-        month = str(date_obj.month).zfill(2)
-        year = str(date_obj.year)
-        if date_format == 'American':
-            date_formatted_current = f'{month_name} {day}{day_suffix}, {year}'
-        else:
-            date_formatted_current = f'{day} {month_name} {year}'
-    else:
-        date_formatted_current = '????-??-??'
-
-    # Format date in previous WOTDs
-    if previous_wotds:
-        for wotd_entry in previous_wotds:
-            try:
-                # Store the original date before formatting
-                original_date = wotd_entry['date']
-                
-                date_obj = datetime.datetime.strptime(original_date, '%Y-%m-%d')
-                previous_day = str(date_obj.day)
-                
-                # Add appropriate suffix
-                if previous_day[-1] == '1' and previous_day != '11':
-                    previous_day_suffix = 'st'
-                elif previous_day[-1] == '2' and previous_day != '12':
-                    previous_day_suffix = 'nd'
-                elif previous_day[-1] == '3' and previous_day != '13':
-                    previous_day_suffix = 'rd'
-                else:
-                    previous_day_suffix = 'th'
-                    
-                previous_month_name = date_obj.strftime('%B')
-                previous_year = str(date_obj.year)
-                
-                # Create a new key for the formatted date
-                if date_format == 'American':
-                    wotd_entry['date_formatted'] = f'{previous_month_name} {previous_day}{previous_day_suffix}, {previous_year}'
-                else:
-                    wotd_entry['date_formatted'] = f'{previous_day} {previous_month_name} {previous_year}'
-
-                # Keep the original date in YYYY-MM-DD format
-                wotd_entry['date'] = original_date
-                wotd_entry['word'] = wotd_entry['word'][:1].upper() + wotd_entry['word'][1:]
-                
-            except ValueError as e:
-                log_warning(f'Failed to parse date {wotd_entry["date"]}: {e}')
-                wotd_entry['date_formatted'] = '????-??-??'
 
-    # Render template
-    return render_template('index.html',
+    return dict(
         wotd=wotd_text,
         device_type=device_type,
         copyright_year=datetime.datetime.now().year,
-        word=index_word[:1].upper() + index_word[1:] if index_word else '',
-        ipa=index_ipa,
-        pos=index_pos,
-        definition=index_definition,
-        date=date_formatted_current,
-        current_date=current_date,
-        previous_wotds=previous_wotds,
-        has_more=has_more,
+        word=current.word,
+        ipa=current.ipa,
+        pos=current.pos,
+        definition=current.definition,
+        date=current.date_formatted,
+        current_date=view.date,
+        previous_wotds=view.previous[date_format],
+        has_more=view.has_more,
+        next_cursor=view.next_cursor,
         date_format=date_format,
+        heading=heading,
+        older_link=older_link  # Replaces the load more button where there is no API, like the static export
     )
 
+def render_lite_index(date_format: str) -> str:
+    view = get_today_view()
+    return render_template('lite/index.html',
+        copyright_year=datetime.datetime.now().year,
+        current=view.words[date_format],
+        previous_wotds=view.previous[date_format],
+        has_more=view.has_more
+    )
+
+ARCHIVE_PAGE_SIZE = 20  # Keeps each archive page around 10 KB
+
+@app_www.route('/archive', methods=['GET'])
+def www_archive():
+    # Server-rendered pages instead of the load more button, for retro consoles and slow connections
+    page = request.args.get('page', default=1, type=int)
+    if page < 1:
+        abort(404)
+    date_format = get_date_format(request.headers.get('Accept-Language', 'en-US'))
+    return cached_page(archive_cache, (wotd.current_date, page, date_format), lambda: render_archive(page, date_format))
+
+def render_archive(page: int, date_format: str, page_link: str = '/archive?page={}') -> str:
+    return render_template('lite/archive.html', **archive_context(page, date_format, page_link))
+
+def archive_context(page: int, date_format: str, page_link: str = '/archive?page={}') -> dict:
+    query_result = wotd.query_page(page, limit=ARCHIVE_PAGE_SIZE)
+    if page > query_result['pages']:
+        abort(404)  # Not cached, so crawlers can't fill the cache with empty pages
+    return dict(
+        copyright_year=datetime.datetime.now().year,
+        words=[make_display_word(entry['date'], entry, date_format) for entry in query_result['results']],
+        page=query_result['page'],
+        pages=query_result['pages'],
+        has_more=query_result['has_more'],
+        page_link=page_link
+    )
+
+@app_www.route('/www/dist/<filename>', methods=['GET'])
+@limiter_www.exempt  # A page view shouldn't use up the rate limit on its stylesheets and scripts
+def www_asset(filename):
+    asset = assets.assets.get(filename)
+    if asset is None:
+        abort(404)
+
+    use_gzip = choose_encoding(request.headers.get('Accept-Encoding', ''), ('gzip',)) == 'gzip'
+    response = Response(asset.gzip_body if use_gzip else asset.body, mimetype=asset.mimetype)
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(f'{asset.etag}-gz' if use_gzip else asset.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
+
+@app_www.after_request
+def www_versioned_static(response):
+    # Static files linked with their content hash (?v=) never change under that URL either
+    if request.endpoint == 'static' and request.args.get('v') and response.status_code == 200:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
 @app_www.route('/about')
 def www_about():
     global github_data
@@ -461,7 +506,7 @@ def www_subscribe():
 def www_databases():
     # Get data
     device_type = get_device_type(request.headers.get('User-Agent', ''))
-    databases = get_wotd_databases()
+    databases = backup_catalog.list()
 
     wotd_text = ''
     if device_type == 'mobile':
@@ -479,20 +524,30 @@ def www_databases():
 
 @app_www.route('/databases/download/<path:filename>', methods=['GET'])
 def download_database(filename):
-    # Get the paths for both database
-    backup_path = os.path.abspath(os.path.join(BASE_DIR, '..', '..', '..', 'dat', 'backups'))
-    db_file = os.path.join(backup_path, filename)
-    
-    # Check if the file exists
-    if os.path.exists(db_file) and filename.endswith('.db'):
-        return send_from_directory(
-            backup_path,
-            filename,
-            mimetype='application/x-sqlite3'
-        )
-    else:
+    backup = backup_catalog.get(filename)
+    if backup is None:
         return 'Database file not found', 404
 
+    # Whole-file downloads from clients that accept gzip get the precompressed copy, resumed downloads get byte ranges of the original
+    accepts_gzip = choose_encoding(request.headers.get('Accept-Encoding', ''), ('gzip',)) == 'gzip'
+    use_gzip = backup.gz_filename is not None and accepts_gzip and 'Range' not in request.headers
+    # Waitress sends the file from its own I/O thread through wsgi.file_wrapper, so the worker thread is freed right away
+    response = send_from_directory(
+        backup_catalog.directory,
+        backup.gz_filename if use_gzip else backup.filename,
+        mimetype='application/x-sqlite3',
+        as_attachment=True,
+        download_name=backup.filename,
+        conditional=True,
+        etag=f'{backup.sha256}-gz' if use_gzip else backup.sha256,
+        max_age=86400
+    )
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Repr-Digest'] = f'sha-256=:{base64.b64encode(bytes.fromhex(backup.sha256)).decode()}:'
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app_www.route('/articles/api-docs', methods=['GET'])
 def www_api():
     # Detect device type based on User-Agent
@@ -514,40 +569,18 @@ def www_api():
         copyright_year=datetime.datetime.now().year
     )
 
-@app_www.route('/articles/terms-discord', methods=['GET'])
-def www_discord_terms():
+@app_www.route('/articles/<slug>', methods=['GET'])
+def www_article(slug):
     # Detect device type based on User-Agent
     device_type = get_device_type(request.headers.get('User-Agent', ''))
 
-    md_content = md_to_html(open(os.path.join(BASE_DIR, 'www', 'static', 'articles', 'terms-discord.md'), 'r', encoding='utf-8').read())
-
-    return render_template('article.html',
-        title='Terms of Service (Discord Bot)',
-        content=md_content,
-        device_type=device_type,
-        copyright_year=datetime.datetime.now().year
-    )
-
-@app_www.route('/articles/privacy-discord', methods=['GET'])
-def www_discord_privacy():
-    # Detect device type based on User-Agent
-    device_type = get_device_type(request.headers.get('User-Agent', ''))
-
-    return render_template('article.html',
-        title='Privacy Policy (Discord Bot)',
-        content=PRIVACY_DISCORD_HTML,
-        device_type=device_type,
-        copyright_year=datetime.datetime.now().year
-    )
-
-@app_www.route('/articles/setup-discord', methods=['GET'])
-def www_discord_setup():
-    # Detect device type based on User-Agent
-    device_type = get_device_type(request.headers.get('User-Agent', ''))
+    article = articles.get(slug)
+    if article is None:
+        abort(404)
 
     return render_template('article.html',
-        title='Discord Bot Setup',
-        content=SETUP_DISCORD_HTML,
+        title=article.title,
+        content=article.html,
         device_type=device_type,
         copyright_year=datetime.datetime.now().year
     )
@@ -645,15 +678,21 @@ def www_admin_append_word():
 
 # This is required for the load more button, the retro console versions of the site will use pages, though
 @app_www.route('/api/query_previous', methods=['GET'])
+@cached(www_cache)
 def www_query_previous():
     date = request.args.get('date', default=wotd.current_date)
-    limit = 3
+    cursor = request.args.get('cursor', default=None)
+    limit = request.args.get('limit', default=3, type=int)
     try:
+        if cursor:
+            date = wotd.decode_cursor(cursor)
         previous_wotds = wotd.query_previous(date, limit=limit)
         if previous_wotds:
             return jsonify(previous_wotds)
         else:
             return jsonify({'error': 'No previous words found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         log_exception(f'Error querying previous words: {e}')
         return jsonify({'error': 'An error occurred while querying previous words'}), 500
@@ -819,7 +858,6 @@ def www_api_admin_append_word():
             definition=definition,
             date=date
         )
-        get_wotd()  # Refresh current WOTD, in case the appended word is for today
         return jsonify({'status': 'success'})
     except Exception as e:
         log_exception(f'Error appending word: {e}')
@@ -834,7 +872,15 @@ def not_found(e):
         device_type=device_type
     ), 404
 
+@app_api.after_request
+def api_conditional_get(response):
+    # Every API answer only changes with the archive, so let clients and proxies revalidate instead of refetching
+    if request.endpoint in ('api_export', 'api_cache_stats'):
+        return response
+    return make_conditional(response)
+
 @app_api.route('/metadata', methods=['GET'])
+@cached(api_cache)
 def api_metadata():
     # Return metadata about the site and API
     return jsonify({
@@ -843,6 +889,7 @@ def api_metadata():
     })
 
 @app_api.route('/query', methods=['GET'])
+@cached(api_cache)
 def api_query():
     date = request.args.get('date', default=wotd.current_date)
     try:
@@ -869,20 +916,68 @@ def api_query():
         return jsonify({'error': 'An error occurred while querying the word'}), 500
 
 @app_api.route('/query_previous', methods=['GET'])
+@cached(api_cache)
 def api_query_previous():
     date = request.args.get('date', default=wotd.current_date)
+    cursor = request.args.get('cursor', default=None)
     limit = request.args.get('limit', default=3, type=int)
     try:
+        if cursor:
+            date = wotd.decode_cursor(cursor)
         previous_wotds = wotd.query_previous(date, limit=limit, allow_future=False)
         if previous_wotds:
             return jsonify(previous_wotds)
         else:
             return jsonify({'error': 'No previous words found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         log_exception(f'Error querying previous words: {e}')
         return jsonify({'error': 'An error occurred while querying previous words'}), 500
 
+@app_api.route('/query_range', methods=['GET'])
+@cached(api_cache)
+def api_query_range():
+    start = request.args.get('start', default=None)
+    end = request.args.get('end', default=wotd.current_date)
+    if not start:
+        return jsonify({'error': 'No start date provided'}), 400
+    try:
+        datetime.datetime.strptime(start, '%Y-%m-%d')
+        datetime.datetime.strptime(end, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    try:
+        return jsonify(wotd.query_range(start, end, allow_future=False))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log_exception(f'Error querying word range: {e}')
+        return jsonify({'error': 'An error occurred while querying the words'}), 500
+
+@app_api.route('/query_batch', methods=['GET'])
+@cached(api_cache)
+def api_query_batch():
+    dates = [date.strip() for date in request.args.get('dates', default='').split(',') if date.strip()]
+    if not dates:
+        return jsonify({'error': 'No dates provided'}), 400
+    try:
+        for date in dates:
+            datetime.datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    try:
+        return jsonify(wotd.query_batch(dates, allow_future=False))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log_exception(f'Error querying word batch: {e}')
+        return jsonify({'error': 'An error occurred while querying the words'}), 500
+
 @app_api.route('/find_wotd', methods=['GET'])
+@cached(api_cache)
 def api_find_wotd():
     word = request.args.get('word', default=None)
     if not word:
@@ -897,7 +992,107 @@ def api_find_wotd():
         log_exception(f'Error finding word: {e}')
         return jsonify({'error': 'An error occurred while finding the word'}), 500
 
-if first_import:
+@app_api.route('/suggest', methods=['GET'])
+@cached(api_cache)
+def api_suggest():
+    prefix = request.args.get('prefix', default=None)
+    limit = request.args.get('limit', default=10, type=int)
+    if not prefix:
+        return jsonify({'error': 'No prefix provided'}), 400
+    try:
+        suggestions = wotd.suggest_words(prefix, limit=limit, allow_future=False)
+        return jsonify({'results': suggestions})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log_exception(f'Error suggesting words: {e}')
+        return jsonify({'error': 'An error occurred while suggesting words'}), 500
+
+@app_api.route('/search', methods=['GET'])
+@cached(api_cache)
+def api_search():
+    query = request.args.get('q', default=None)
+    page = request.args.get('page', default=1, type=int)
+    limit = request.args.get('limit', default=10, type=int)
+    if not query:
+        return jsonify({'error': 'No query provided'}), 400
+    try:
+        search_results = wotd.search_words(query, page=page, limit=limit, allow_future=False)
+        return jsonify(search_results)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        log_exception(f'Error searching words: {e}')
+        return jsonify({'error': 'An error occurred while searching words'}), 500
+
+@app_api.route('/cache_stats', methods=['GET'])
+def api_cache_stats():
+    # Hit/miss counters of the response caches, to see what they save
+    return jsonify({
+        'www': www_cache.stats(),
+        'www_index': index_cache.stats(),
+        'www_archive': archive_cache.stats(),
+        'api': api_cache.stats(),
+        'compression': compression_cache.stats()
+    })
+
+EXPORT_CHUNK_SIZE = 65536  # Bytes of output to buffer before sending a chunk
+
+def generate_export(entries, export_format, compress):
+    '''Stream the entries as NDJSON or CSV in chunks, optionally gzipped, without holding the whole export in memory'''
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31 writes a gzip container
+    buffer = StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if export_format == 'csv':
+        writer.writerow(['date', 'word', 'ipa', 'pos', 'definition'])
+
+    for entry in entries:
+        if export_format == 'csv':
+            writer.writerow([entry['date'], entry['word'], entry['ipa'], entry['pos'], entry['definition']])
+        else:
+            buffer.write(json.dumps(dict(entry), ensure_ascii=False))
+            buffer.write('\n')
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            chunk = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+
+    chunk = buffer.getvalue().encode('utf-8')
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+@app_api.route('/export', methods=['GET'])
+def api_export():
+    export_format = request.args.get('format', default='ndjson').lower()
+    since = request.args.get('since', default=None)
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Invalid format. Use ndjson or csv'}), 400
+    if since:
+        try:
+            datetime.datetime.strptime(since, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    # Compress on the fly if the client accepts gzip
+    compress = choose_encoding(request.headers.get('Accept-Encoding', ''), ('gzip',)) == 'gzip'
+    entries = wotd.iter_words(since=since, allow_future=False)
+    response = Response(
+        generate_export(entries, export_format, compress),
+        mimetype='text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=wotd.{export_format}'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+# WOTD_NO_SERVE lets tools like the static site export use the site without starting its servers
+if first_import and not os.getenv('WOTD_NO_SERVE'):
     if WWW_ENABLED:
         threading.Thread(target=lambda: serve(app_www, host='0.0.0.0', port=WWW_PORT, threads=WWW_THREADS, backlog=WWW_BACKLOG), daemon=True).start()
     if API_ENABLED:
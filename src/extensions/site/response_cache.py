@@ -0,0 +1,113 @@
+from collections import OrderedDict
+import datetime
+import functools
+import hashlib
+import threading
+
+from flask import Response, make_response, request
+
+import wotd
+
+class ResponseCache:
+    '''Bounded LRU cache of encoded responses, thrown away whenever wotd.archive_version changes'''
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.version = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            if version != self.version:
+                # The archive changed, nothing cached so far can be trusted
+                self.entries.clear()
+                self.version = version
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, entry):
+        with self._lock:
+            if version != self.version:
+                return  # Rendered from an older archive, don't keep it
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_build(self, key, build):
+        '''The entry for a key, calling build() to make and store it on a miss (build may return None to skip caching)'''
+        version = wotd.archive_version  # Read before building, so a concurrent change can't be cached under the new version
+        entry = self.get(key, version)
+        if entry is None:
+            entry = build()
+            if entry is not None:
+                self.put(key, version, entry)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'archive_version': self.version
+            }
+
+def cached(cache):
+    '''Decorator that serves a route from the cache, keyed by the route and its normalized query parameters'''
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            rendered = []  # The response rendered on a miss, returned as it is
+
+            def render():
+                response = make_response(view(*args, **kwargs))
+                rendered.append(response)
+                # Only cache answers that depend on the archive alone, not errors or streams
+                if response.status_code not in (200, 404) or response.is_streamed:
+                    return None
+                body = response.get_data()
+                etag = hashlib.sha1(body).hexdigest()  # Computed once here instead of on every hit
+                response.set_etag(etag)
+                return (body, response.status_code, response.mimetype, etag)
+
+            entry = cache.get_or_build(key, render)
+            if rendered:
+                return rendered[0]
+            body, status, mimetype, etag = entry
+            response = Response(body, status=status, mimetype=mimetype)
+            response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
+
+def make_conditional(response):
+    '''Add validators and caching headers that expire at the next UTC midnight, and turn the response
+    into a 304 Not Modified if the client's copy is still current'''
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200 or response.is_streamed:
+        return response
+
+    if not response.get_etag()[0]:
+        response.add_etag()  # Strong ETag from the body
+
+    # Everything may change when the next word is published at midnight UTC
+    now = datetime.datetime.now(datetime.timezone.utc)
+    next_midnight = (now + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    response.last_modified = min(wotd.archive_modified, now)
+    response.expires = next_midnight
+    response.cache_control.public = True
+    response.cache_control.max_age = int((next_midnight - now).total_seconds())
+
+    return response.make_conditional(request)
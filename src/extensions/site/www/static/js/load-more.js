@@ -2,6 +2,7 @@ function attachLoadMoreListener() {
     document.getElementById('load-more-button').addEventListener('click', async function () {
         const container = this.parentElement;
         const dateFormat = this.getAttribute('data-date-format'); // Get the date format from the button
+        const cursor = this.getAttribute('data-cursor'); // Cursor for the next page, if the server provided one
 
         // Remove the current load-more-button
         this.remove();
@@ -22,9 +23,10 @@ function attachLoadMoreListener() {
         }
 
         try {
-            // Fetch data from the API
-            const response = await fetch(`/api/query_previous?date=${formattedDate}`);
-            const { has_more, results } = await response.json();
+            // Fetch data from the API, continuing from the cursor when there is one
+            const query = cursor ? `cursor=${encodeURIComponent(cursor)}` : `date=${formattedDate}`;
+            const response = await fetch(`/api/query_previous?${query}`);
+            const { has_more, results, next_cursor } = await response.json();
 
             // Generate cards for the fetched data
             let cardsHTML = '';
@@ -69,7 +71,7 @@ function attachLoadMoreListener() {
             // If there are more words to load, append a new load-more-button
             if (has_more) {
                 container.innerHTML += `
-                    <button id="load-more-button" class="button load-more-button" data-date-format="${dateFormat}">Load More</button>
+                    <button id="load-more-button" class="button load-more-button" data-date-format="${dateFormat}" data-cursor="${next_cursor || ''}">Load More</button>
                 `;
 
                 // Reattach the listener to the new load-more-button
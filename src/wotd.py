@@ -1,16 +1,137 @@
 import asyncio
+import base64
+import binascii
+import bisect
+from collections.abc import Mapping
 from datetime import datetime, timedelta
+import gzip
 import os
 import pytz
+import re
+import shutil
 import sqlite3
+import sys
 import threading
 
 from logs import log_info, log_warning, log_error
 
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'dat', 'wotd.db')
+BACKUPS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'dat', 'backups'))  # Monthly snapshots served on /databases
 
-wotd_db = []  # Store the Word of the Day database in memory
-_cache_lock = threading.Lock()  # Thread safety lock
+class WordEntry(Mapping):
+    '''A single Word of the Day, stored compactly and read-only.
+
+    Behaves like the dicts used before (entry['word'], entry.get('ipa'), dict(entry)), so it can be handed
+    straight to callers instead of a defensive copy.
+    '''
+
+    __slots__ = ('date', 'word', 'ipa', 'pos', 'definition')
+
+    def __init__(self, date, word, ipa, pos, definition):
+        object.__setattr__(self, 'date', date)
+        object.__setattr__(self, 'word', word)
+        object.__setattr__(self, 'ipa', ipa)
+        object.__setattr__(self, 'pos', sys.intern(pos) if pos else pos)  # Only a handful of parts of speech exist
+        object.__setattr__(self, 'definition', definition)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('WordEntry is read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError('WordEntry is read-only')
+
+    def __getitem__(self, key):
+        if key not in WordEntry.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(WordEntry.__slots__)
+
+    def __len__(self):
+        return len(WordEntry.__slots__)
+
+    def __repr__(self):
+        return f'WordEntry({dict(self)!r})'
+
+    def to_dict(self):
+        return {'date': self.date, 'word': self.word, 'ipa': self.ipa, 'pos': self.pos, 'definition': self.definition}
+
+class Archive:
+    '''Immutable snapshot of the Word of the Day database held in memory, along with its indexes.
+
+    Readers grab the current snapshot (wotd_db) without locking. Writers never modify a published
+    snapshot; they build a new one with with_entry() and swap the module-level reference in one assignment.
+    '''
+
+    def __init__(self, entries=(), dates=(), date_index=None, word_index=None, words=()):
+        self.entries = entries  # Entries sorted by date
+        self.dates = dates  # Dates of entries in the same order, for bisect lookups
+        self.date_index = date_index or {}  # Maps each date (YYYY-MM-DD) to its entry
+        self.word_index = word_index or {}  # Maps each lowercased word to the sorted tuple of dates it was used on
+        self.words = words  # Sorted unique lowercased words, for prefix lookups
+
+    @classmethod
+    def from_entries(cls, entries):
+        entries = sorted(entries, key=lambda x: x.date)
+        word_dates = {}
+        for entry in entries:  # Entries are sorted, so each list of dates is too
+            word_dates.setdefault(_normalize_word(entry.word), []).append(entry.date)
+        return cls(
+            entries=entries,
+            dates=[entry.date for entry in entries],
+            date_index={entry.date: entry for entry in entries},
+            word_index={key: tuple(dates) for key, dates in word_dates.items()},
+            words=sorted(word_dates)
+        )
+
+    def with_entry(self, entry):
+        '''Return a new snapshot with the entry inserted, or replacing the entry with the same date.'''
+        entries = list(self.entries)
+        dates = list(self.dates)
+        date_index = dict(self.date_index)
+        word_index = dict(self.word_index)
+        words = list(self.words)
+
+        position = bisect.bisect_left(dates, entry.date)
+        existing = date_index.get(entry.date)
+        if existing is not None:
+            # Drop the replaced entry from the word index
+            key = _normalize_word(existing.word)
+            remaining = tuple(d for d in word_index[key] if d != existing.date)
+            if remaining:
+                word_index[key] = remaining
+            else:
+                del word_index[key]
+                del words[bisect.bisect_left(words, key)]
+            entries[position] = entry
+        else:
+            dates.insert(position, entry.date)
+            entries.insert(position, entry)
+        date_index[entry.date] = entry
+
+        key = _normalize_word(entry.word)
+        if key in word_index:
+            word_index[key] = tuple(sorted(word_index[key] + (entry.date,)))
+        else:
+            word_index[key] = (entry.date,)
+            bisect.insort(words, key)
+
+        return Archive(entries, dates, date_index, word_index, words)
+
+wotd_db = Archive()  # The current snapshot of the Word of the Day database in memory
+_write_lock = threading.Lock()  # Serializes writers, readers never need it
+
+# Increases every time the published archive changes (a word is appended or replaced, or a new day starts),
+# so anything derived from it (like cached responses) knows when to be thrown away
+archive_version = 0
+archive_modified = datetime.now(pytz.UTC).replace(microsecond=0)  # When archive_version last changed
+
+def bump_archive_version():
+    global archive_version, archive_modified
+    with _write_lock:
+        archive_version += 1
+        archive_modified = datetime.now(pytz.UTC).replace(microsecond=0)
 
 # Set timezone to UTC
 tz = pytz.timezone('UTC')
@@ -19,6 +140,15 @@ tz = pytz.timezone('UTC')
 global current_date
 current_date = datetime.now(tz).strftime('%Y-%m-%d')
 
+# Maximum number of words returned by one page of query_previous
+MAX_PAGE_SIZE = 250
+
+# Maximum number of words returned by query_range and query_batch (a year's worth)
+MAX_RANGE_SIZE = 366
+
+# Words that are too common to be worth searching for (e.g. "words meaning happy" searches for "happy")
+SEARCH_STOP_WORDS = {'a', 'an', 'and', 'as', 'by', 'for', 'in', 'is', 'it', 'meaning', 'means', 'of', 'on', 'or', 'that', 'the', 'to', 'with', 'word', 'words'}
+
 # Initialize the Word of the Day variables
 date = word = ipa = pos = definition = ''
 
@@ -34,10 +164,45 @@ def init_db():
                 definition TEXT,
                 UNIQUE(date)
             )''')
+            _create_search_table(c)
         log_info('Database initialized successfully.')
     except Exception as e:
         log_error(f'Failed to initialize database: {e}')
 
+def _create_search_table(c):
+    # Full-text index over words and definitions, the date links each row back to the words table
+    c.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+        date UNINDEXED,
+        word,
+        definition,
+        tokenize = 'porter unicode61'
+    )''')
+
+def _update_search_row(c, date, word, definition):
+    c.execute('DELETE FROM words_fts WHERE date = ?', (date,))
+    c.execute('INSERT INTO words_fts (date, word, definition) VALUES (?, ?, ?)', (date, word, definition or ''))
+
+def init_search_index():
+    try:
+        with sqlite3.connect(DB_PATH) as conn:
+            c = conn.cursor()
+            _create_search_table(c)
+            # Rebuild the index if it has drifted from the words table (e.g. it was just created, or rows were edited by hand)
+            words_count = c.execute('SELECT COUNT(*) FROM words').fetchone()[0]
+            indexed_count = c.execute('SELECT COUNT(*) FROM words_fts').fetchone()[0]
+            drifted = c.execute('''SELECT EXISTS (
+                                       SELECT date, word, COALESCE(definition, '') FROM words
+                                       EXCEPT SELECT date, word, definition FROM words_fts
+                                   )''').fetchone()[0]
+            if words_count != indexed_count or drifted:
+                c.execute('DELETE FROM words_fts')
+                c.execute('''INSERT INTO words_fts (date, word, definition)
+                             SELECT date, word, COALESCE(definition, '') FROM words''')
+                log_info(f'Rebuilt the search index with {words_count} words.')
+            conn.commit()
+    except Exception as e:
+        log_error(f'Failed to initialize search index: {e}')
+
 def set_wotd(new_date, new_word, new_ipa, new_pos, new_definition):
     global date, word, ipa, pos, definition
     date = new_date
@@ -47,74 +212,197 @@ def set_wotd(new_date, new_word, new_ipa, new_pos, new_definition):
     definition = new_definition
     log_info(f'Set Word of the Day: {date}, {word}, {ipa}, {pos}, {definition}')
 
+def _normalize_word(word):
+    return (word or '').lower()
+
 def query_word(date):
-    with _cache_lock:
-        for entry in wotd_db:
-            if entry['date'] == date:
-                return entry.copy()  # Return a copy to prevent external modification
-    return None
+    return wotd_db.date_index.get(date)  # Entries are read-only, so no copy is needed
+
+def encode_cursor(date):
+    # Cursors are opaque to clients, but are simply the date the next page starts before
+    return base64.urlsafe_b64encode(date.encode('utf-8')).decode('utf-8').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        date = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        datetime.strptime(date, '%Y-%m-%d')
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError('Invalid cursor.')
+    return date
 
 def query_previous(date, limit=1, allow_future=False):
     if not date:
         raise ValueError('Date cannot be empty.')
-    if limit > 8:
-        raise ValueError('Limit cannot exceed 8.')
-    
-    filtered_entries = []
-    
-    with _cache_lock:
-        for entry in reversed(wotd_db):
-            entry_date_str = entry['date']
-            
-            # Parse the entry date and make it timezone-aware
-            entry_date = datetime.strptime(entry_date_str, '%Y-%m-%d')
-            entry_date = tz.localize(entry_date)
-            
-            current_time = datetime.now(tz)
-            
-            # Skip future entries if not allowed
-            if not allow_future and entry_date > current_time:
-                continue
-            
-            # Only include entries before the given date
-            if entry_date_str < date:
-                filtered_entries.append(entry.copy())  # Copy to prevent modification
-            
-            # Stop when we have enough entries
-            if len(filtered_entries) == limit:
-                break
-        
-        # Check if there are more entries available
-        has_more = False
-        if filtered_entries:
-            last_date = filtered_entries[-1]['date']
-            for entry in wotd_db:
-                if entry['date'] < last_date:
-                    has_more = True
-                    break
-    
+    if limit > MAX_PAGE_SIZE:
+        raise ValueError(f'Limit cannot exceed {MAX_PAGE_SIZE}.')
+
+    archive = wotd_db
+    # Only include entries before the given date
+    end = bisect.bisect_left(archive.dates, date)
+    # Skip future entries if not allowed (an entry is published at 00:00 UTC on its date)
+    if not allow_future:
+        end = min(end, bisect.bisect_right(archive.dates, datetime.now(tz).strftime('%Y-%m-%d')))
+    start = max(end - max(limit, 0), 0)
+    filtered_entries = archive.entries[start:end][::-1]
+
+    # There are more entries available if anything is left before the returned slice
+    has_more = bool(filtered_entries) and start > 0
+
     return {
         'results': filtered_entries,
-        'has_more': has_more
+        'has_more': has_more,
+        'next_cursor': encode_cursor(filtered_entries[-1].date) if has_more else None
+    }
+
+def query_range(start_date, end_date, allow_future=False):
+    if not start_date or not end_date:
+        raise ValueError('Start and end dates cannot be empty.')
+    if start_date > end_date:
+        raise ValueError('Start date cannot be after end date.')
+
+    archive = wotd_db
+    # Skip future entries if not allowed
+    if not allow_future:
+        end_date = min(end_date, datetime.now(tz).strftime('%Y-%m-%d'))
+    start = bisect.bisect_left(archive.dates, start_date)
+    end = bisect.bisect_right(archive.dates, end_date)
+
+    return {
+        'results': archive.entries[start:min(end, start + MAX_RANGE_SIZE)],
+        'has_more': end - start > MAX_RANGE_SIZE
     }
 
+def query_page(page=1, limit=20, allow_future=False):
+    '''Return one page of the archive, newest first, for page-based browsing'''
+    if page < 1:
+        raise ValueError('Page must be 1 or greater.')
+    if limit > MAX_PAGE_SIZE:
+        raise ValueError(f'Limit cannot exceed {MAX_PAGE_SIZE}.')
+    limit = max(limit, 1)
+
+    archive = wotd_db
+    total = len(archive.dates)
+    if not allow_future:
+        total = bisect.bisect_right(archive.dates, datetime.now(tz).strftime('%Y-%m-%d'))
+    end = max(total - (page - 1) * limit, 0)
+    start = max(end - limit, 0)
+
+    return {
+        'results': archive.entries[start:end][::-1],
+        'page': page,
+        'pages': max((total + limit - 1) // limit, 1),
+        'has_more': start > 0
+    }
+
+def query_batch(dates, allow_future=False):
+    if not dates:
+        raise ValueError('Dates cannot be empty.')
+    if len(dates) > MAX_RANGE_SIZE:
+        raise ValueError(f'Cannot query more than {MAX_RANGE_SIZE} dates at once.')
+
+    archive = wotd_db
+    today = datetime.now(tz).strftime('%Y-%m-%d')
+    results = []
+    missing = []
+    for requested_date in dict.fromkeys(dates):  # Drop duplicates but keep the requested order
+        entry = archive.date_index.get(requested_date)
+        # Future entries are reported as missing, so they can't be discovered this way
+        if entry is None or (not allow_future and requested_date > today):
+            missing.append(requested_date)
+        else:
+            results.append(entry)
+
+    return {
+        'results': results,
+        'missing': missing
+    }
+
+def iter_words(since=None, allow_future=False):
+    '''Yield every entry in date order, starting at the since date (inclusive) if given.'''
+    archive = wotd_db  # Iterate over one snapshot, so the export is consistent even if words are appended meanwhile
+    start = bisect.bisect_left(archive.dates, since) if since else 0
+    # Skip future entries if not allowed
+    end = len(archive.entries) if allow_future else bisect.bisect_right(archive.dates, datetime.now(tz).strftime('%Y-%m-%d'))
+    for position in range(start, end):
+        yield archive.entries[position]
+
 def find_wotd(word_search, allow_future=False):
     if not word_search:
         raise ValueError('Word cannot be empty.')
 
-    with _cache_lock:
-        for entry in wotd_db:
-            if entry['word'].lower() == word_search.lower():
-                entry_date_str = entry['date']
-                entry_date = datetime.strptime(entry_date_str, '%Y-%m-%d')
-                entry_date = tz.localize(entry_date)
-                current_time = datetime.now(tz)
-                if not allow_future and entry_date > current_time:
-                    continue
-                return entry.copy()
+    archive = wotd_db
+    dates = archive.word_index.get(_normalize_word(word_search))
+    if dates:
+        # Dates are sorted, so the earliest use of the word is the first one
+        if allow_future or dates[0] <= datetime.now(tz).strftime('%Y-%m-%d'):
+            return archive.date_index[dates[0]]
     return None
 
+def suggest_words(prefix, limit=10, allow_future=False):
+    if not prefix:
+        raise ValueError('Prefix cannot be empty.')
+    if limit > 25:
+        raise ValueError('Limit cannot exceed 25.')
+
+    prefix = _normalize_word(prefix)
+    today = datetime.now(tz).strftime('%Y-%m-%d')
+    suggestions = []
+
+    archive = wotd_db
+    # Every word starting with the prefix sits in one contiguous run of the sorted word list
+    position = bisect.bisect_left(archive.words, prefix)
+    while position < len(archive.words) and len(suggestions) < limit:
+        key = archive.words[position]
+        if not key.startswith(prefix):
+            break
+        first_date = archive.word_index[key][0]
+        if allow_future or first_date <= today:
+            suggestions.append(archive.date_index[first_date].word)
+        position += 1
+
+    return suggestions
+
+def search_words(query, page=1, limit=10, allow_future=False):
+    if not query:
+        raise ValueError('Query cannot be empty.')
+    if limit > 25:
+        raise ValueError('Limit cannot exceed 25.')
+    if limit < 1:
+        raise ValueError('Limit must be at least 1.')  # SQLite reads a negative LIMIT as no limit at all
+    if page < 1:
+        raise ValueError('Page must be at least 1.')
+
+    # Quote every term so user input can never be parsed as FTS5 syntax, and match any of them (best matches rank first)
+    terms = re.findall(r'\w+', query.lower())
+    if not terms:
+        raise ValueError('Query must contain at least one word.')
+    terms = [term for term in terms if term not in SEARCH_STOP_WORDS] or terms
+    match_query = ' OR '.join(f'"{term}"' for term in terms)
+
+    # Skip future entries if not allowed
+    last_date = '9999-12-31' if allow_future else datetime.now(tz).strftime('%Y-%m-%d')
+
+    with sqlite3.connect(DB_PATH) as conn:
+        c = conn.cursor()
+        # Matches in the word itself weigh more than matches in the definition
+        c.execute('''SELECT date FROM words_fts
+                     WHERE words_fts MATCH ? AND rank MATCH 'bm25(0.0, 4.0, 1.0)' AND date <= ?
+                     ORDER BY rank
+                     LIMIT ? OFFSET ?''', (match_query, last_date, limit + 1, (page - 1) * limit))
+        dates = [row[0] for row in c.fetchall()]
+
+    archive = wotd_db
+    results = [archive.date_index[result_date] for result_date in dates[:limit] if result_date in archive.date_index]
+
+    return {
+        'results': results,
+        'page': page,
+        'has_more': len(dates) > limit
+    }
+
 def append_word(date, word, ipa, pos, definition):
+    global wotd_db
+
     if date is None:  # If date is None, use the date after the most recent one used in the database
         with sqlite3.connect(DB_PATH) as conn:
             c = conn.cursor()
@@ -133,81 +421,133 @@ def append_word(date, word, ipa, pos, definition):
         c = conn.cursor()
         c.execute('''INSERT OR REPLACE INTO words (date, word, ipa, pos, definition)
                      VALUES (?, ?, ?, ?, ?)''', (date, word, ipa, pos, definition))
+        _update_search_row(c, date, word, definition)
         conn.commit()
 
-    new_entry = {'date': date, 'word': word, 'ipa': ipa, 'pos': pos, 'definition': definition}
+    new_entry = WordEntry(date, word, ipa, pos, definition)
     
-    with _cache_lock:
-        # Check if entry already exists and update it, otherwise append
-        found = False
-        for i, entry in enumerate(wotd_db):
-            if entry['date'] == date:
-                wotd_db[i] = new_entry
-                found = True
-                break
-        if not found:
-            wotd_db.append(new_entry)
-            # Keep sorted by date
-            wotd_db.sort(key=lambda x: x['date'])
+    with _write_lock:
+        # Publish a new snapshot that updates the entry if it already exists, otherwise inserts it in date order
+        wotd_db = wotd_db.with_entry(new_entry)
+    bump_archive_version()
 
     return date
 
 def replace_word(date, word, ipa, pos, definition):
+    global wotd_db
+
     with sqlite3.connect(DB_PATH) as conn:
         c = conn.cursor()
         c.execute('''UPDATE words 
                      SET word = ?, ipa = ?, pos = ?, definition = ? 
                      WHERE date = ?''', (word, ipa, pos, definition, date))
+        if c.rowcount:
+            _update_search_row(c, date, word, definition)
         conn.commit()
     
-    with _cache_lock:
-        for entry in wotd_db:
-            if entry['date'] == date:
-                entry['word'] = word
-                entry['ipa'] = ipa
-                entry['pos'] = pos
-                entry['definition'] = definition
-                break
-
-def save_wotd_database():
+    with _write_lock:
+        # Published entries are never modified in place, replace it with a new one instead
+        if date in wotd_db.date_index:
+            wotd_db = wotd_db.with_entry(WordEntry(date, word, ipa, pos, definition))
+    bump_archive_version()
+
+_backup_lock = threading.Lock()  # Only one backup run at a time
+
+def month_end(year_month: str) -> str:
+    '''Last day (YYYY-MM-DD) of a YYYY-MM month'''
+    first_day_of_month = datetime.strptime(year_month, '%Y-%m')
+    first_day_of_next_month = (first_day_of_month + timedelta(days=32)).replace(day=1)
+    return (first_day_of_next_month - timedelta(days=1)).strftime('%Y-%m-%d')
+
+def save_wotd_database(year_month: str):
+    '''Snapshot every word up to the end of a YYYY-MM month into BACKUPS_PATH/wotd_YYYY-MM.db'''
+    last_date_str = month_end(year_month)
+    if not os.path.exists(BACKUPS_PATH):
+        os.makedirs(BACKUPS_PATH)
+    backup_db_path = os.path.join(BACKUPS_PATH, f'wotd_{year_month}.db')
+    temp_path = f'{backup_db_path}.tmp'
+    if os.path.exists(temp_path):
+        os.remove(temp_path)  # Left over from an interrupted run
+
+    # Copy the rows inside SQLite instead of pulling them all into Python
+    backup_conn = sqlite3.connect(temp_path)
     try:
+        backup_c = backup_conn.cursor()
+        backup_c.execute('''CREATE TABLE words (
+            date TEXT PRIMARY KEY,
+            word TEXT NOT NULL,
+            ipa TEXT,
+            pos TEXT,
+            definition TEXT,
+            UNIQUE(date)
+        )''')
+        backup_c.execute('ATTACH DATABASE ? AS archive', (DB_PATH,))
+        backup_c.execute('''INSERT INTO words (date, word, ipa, pos, definition)
+                            SELECT date, word, ipa, pos, definition FROM archive.words
+                            WHERE date <= ?
+                            ORDER BY date ASC''', (last_date_str,))
+        backup_conn.commit()
+        backup_c.execute('DETACH DATABASE archive')
+    finally:
+        backup_conn.close()
+
+    os.replace(temp_path, backup_db_path)  # Readers never see a half-written file
+    compress_backup(backup_db_path)
+    log_info(f'Saved WOTD database up to {last_date_str} to {backup_db_path}')
+
+def save_missing_backups():
+    '''Create the snapshot of every finished month that doesn't have one yet, e.g. after the bot was down on the 1st.
+    Safe to call any number of times, months that are already saved are left alone'''
+    with _backup_lock:
+        try:
+            archive = wotd_db
+            if not archive.dates:
+                return
+            last_month = (datetime.now(tz).replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+            year_month = archive.dates[0][:7]
+            while year_month <= last_month:
+                backup_db_path = os.path.join(BACKUPS_PATH, f'wotd_{year_month}.db')
+                if not os.path.exists(backup_db_path):
+                    save_wotd_database(year_month)
+                elif not os.path.exists(f'{backup_db_path}.gz'):
+                    compress_backup(backup_db_path)
+                year_month = (datetime.strptime(year_month, '%Y-%m') + timedelta(days=32)).strftime('%Y-%m')
+        except Exception as e:
+            log_error(f'Failed to save WOTD database: {e}')
+
+def schedule_backups():
+    '''Run save_missing_backups in a worker thread, so copying the archive never stalls the event loop'''
+    return asyncio.get_running_loop().run_in_executor(None, save_missing_backups)
+
+def compress_backup(backup_db_path):
+    '''Write a gzipped copy of a backup next to it, so downloads can be served precompressed'''
+    temp_path = f'{backup_db_path}.gz.tmp'
+    with open(backup_db_path, 'rb') as src, open(temp_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(temp_path, f'{backup_db_path}.gz')  # Readers never see a half-written file
+
+def load_wotd_db():
+    global wotd_db
+
+    # Set the wotd_db snapshot from the database
+    try:
+        init_search_index()
         with sqlite3.connect(DB_PATH) as conn:
             c = conn.cursor()
-            # Get the last day of the previous month
-            first_day_of_current_month = datetime.now(tz).replace(day=1)
-            last_day_of_previous_month = first_day_of_current_month - timedelta(days=1)
-            last_date_str = last_day_of_previous_month.strftime('%Y-%m-%d')
-            last_ym_strr = last_day_of_previous_month.strftime('%Y-%m')  # For naming the backup file (YYYY-MM)
-
-            # Query for all entries up to the last day of the previous month
             c.execute('''SELECT date, word, ipa, pos, definition FROM words 
-                         WHERE date <= ? 
-                         ORDER BY date ASC''', (last_date_str,))
+                         ORDER BY date ASC''')
             results = c.fetchall()
-
-            # Save to a new database file
-            if not os.path.exists(os.path.join(os.path.dirname(__file__), '..', 'dat', 'backups')):
-                os.makedirs(os.path.join(os.path.dirname(__file__), '..', 'dat', 'backups'))
-            backup_db_path = os.path.join(os.path.dirname(__file__), '..', 'dat', 'backups', f'wotd_{last_ym_strr}.db')
-            with sqlite3.connect(backup_db_path) as backup_conn:
-                backup_c = backup_conn.cursor()
-                backup_c.execute('''CREATE TABLE IF NOT EXISTS words (
-                    date TEXT PRIMARY KEY,
-                    word TEXT NOT NULL,
-                    ipa TEXT,
-                    pos TEXT,
-                    definition TEXT,
-                    UNIQUE(date)
-                )''')
-                backup_c.executemany('''INSERT OR REPLACE INTO words (date, word, ipa, pos, definition)
-                                        VALUES (?, ?, ?, ?, ?)''', results)
-                backup_conn.commit()
-            log_info(f'Saved WOTD database up to {last_date_str} to {backup_db_path}')
+            
+            archive = Archive.from_entries(WordEntry(*row) for row in results)
+            with _write_lock:
+                wotd_db = archive
+            bump_archive_version()
+        log_info('WOTD database loaded into memory.')
     except Exception as e:
-        log_error(f'Failed to save WOTD database: {e}')
+        log_error(f'Failed to load WOTD database into memory: {e}')
 
 async def wotd_main_loop():
-    global current_date, date, word, ipa, pos, definition, wotd_db
+    global current_date, date, word, ipa, pos, definition
 
     # Initialize the database if it doesn't exist
     if not os.path.exists(DB_PATH) or os.path.getsize(DB_PATH) == 0:
@@ -217,22 +557,13 @@ async def wotd_main_loop():
         except Exception as e:
             log_error(f'Failed to initialize database: {e}')
     else:
-        # Set the wotd_db list from the database
-        try:
-            with sqlite3.connect(DB_PATH) as conn:
-                c = conn.cursor()
-                c.execute('''SELECT date, word, ipa, pos, definition FROM words 
-                             ORDER BY date ASC''')
-                results = c.fetchall()
-                
-                with _cache_lock:
-                    wotd_db[:] = [{'date': row[0], 'word': row[1], 'ipa': row[2], 'pos': row[3], 'definition': row[4]} for row in results]
-            log_info('WOTD database loaded into memory.')
-        except Exception as e:
-            log_error(f'Failed to load WOTD database into memory: {e}')
+        load_wotd_db()
 
     current_date = datetime.now(tz).strftime('%Y-%m-%d')
 
+    # Catch up on monthly databases missed while the bot was down
+    schedule_backups()
+
     # Loop to get the Word of the Day every day at 12:00 AM UTC
     log_info('Starting Word of the Day loop...')
     while True:
@@ -256,8 +587,9 @@ async def wotd_main_loop():
 
         # Check whether it is a new month to save a database of the WOTDs for public access
         if datetime.now(tz).day == 1:
-            save_wotd_database()
+            schedule_backups()
 
         await asyncio.sleep(time_until_next_day.total_seconds())  # Sleep until the next day
         current_date = (datetime.strptime(current_date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        bump_archive_version()  # Yesterday's future word is published now
         log_info(f'Current date updated to {current_date}')
\ No newline at end of file
@@ -0,0 +1,52 @@
+# Tests for the full-text definition search (wotd.search_words)
+# Usage: python -m pytest tests
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import wotd
+
+ROWS = [
+    ('2025-01-01', 'serendipity', '/ˌsɛɹ.ənˈdɪp.ɪ.ti/', 'Noun', 'A happy accident, a pleasant surprise.'),
+    ('2025-01-02', 'petrichor', '/ˈpɛt.ɹɪ.kɔː/', 'Noun', 'The pleasant smell of rain on dry ground.'),
+    ('2025-01-03', 'sonder', '/ˈsɒn.də/', 'Noun', 'The realization that every passerby has a life as vivid as your own.'),
+    ('2025-01-04', 'eunoia', '/juːˈnɔɪ.ə/', 'Noun', 'Well mind, beautiful thinking, a pleasant goodwill.')
+]
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'wotd.db')
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('''CREATE TABLE words (
+            date TEXT PRIMARY KEY,
+            word TEXT NOT NULL,
+            ipa TEXT,
+            pos TEXT,
+            definition TEXT,
+            UNIQUE(date)
+        )''')
+        conn.executemany('INSERT INTO words VALUES (?, ?, ?, ?, ?)', ROWS)
+        conn.commit()
+    monkeypatch.setattr(wotd, 'DB_PATH', db_path)
+    wotd.load_wotd_db()  # Also builds the search index
+
+def test_search_pages(archive):
+    first = wotd.search_words('pleasant', page=1, limit=2)
+    assert len(first['results']) == 2
+    assert first['has_more']
+    second = wotd.search_words('pleasant', page=2, limit=2)
+    assert len(second['results']) == 1
+    assert not second['has_more']
+
+@pytest.mark.parametrize('limit', [0, -1, -2])
+def test_search_rejects_non_positive_limit(archive, limit):
+    # A negative LIMIT means no limit to SQLite, which would get around the page size cap
+    with pytest.raises(ValueError):
+        wotd.search_words('pleasant', limit=limit)
+
+def test_search_rejects_large_limit(archive):
+    with pytest.raises(ValueError):
+        wotd.search_words('pleasant', limit=26)